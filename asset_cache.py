@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+import pygame
+
+
+def asset_size(asset):
+    """Оценка памяти, занимаемой ресурсом, в байтах"""
+    if isinstance(asset, pygame.Surface):
+        return asset.get_pitch() * asset.get_height()
+    if isinstance(asset, pygame.font.Font):
+        # Размер глифов шрифта pygame не сообщает: оценка по высоте строки
+        return 256 * asset.get_linesize() ** 2
+    return 0
+
+
+def to_display_format(surface):
+    """Перевод изображения в формат дисплея (с альфа-каналом, если он есть)"""
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
+
+
+class AssetCache:
+    """LRU-кэш ресурсов с бюджетом памяти
+
+    Неудачные загрузки запоминаются на retry_after секунд, после чего загрузка
+    повторяется. Изображения переводятся в формат дисплея, как только он создан.
+    """
+
+    def __init__(self, max_bytes, retry_after=5.0):
+        self.max_bytes = max_bytes
+        self.retry_after = retry_after
+        self.entries = OrderedDict()  # ключ -> [ресурс, размер, переведён ли в формат дисплея]
+        self.failures = {}  # ключ -> время, после которого можно повторить загрузку
+        self.size = 0
+        self.lock = threading.RLock()  # Кэш общий с потоками фоновой загрузки
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+        self.conversions = 0
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, loader):
+        """Ресурс из кэша или результат loader() (None - загрузка не удалась)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                if not entry[2]:
+                    self._convert(entry)
+                return entry[0]
+
+            retry_at = self.failures.get(key)
+            if retry_at is not None and time.monotonic() < retry_at:
+                self.negative_hits += 1
+                return None
+            self.misses += 1
+
+        # Загрузка идёт без блокировки, чтобы не задерживать другие потоки
+        asset = loader()
+
+        with self.lock:
+            if asset is None:
+                self.failures[key] = time.monotonic() + self.retry_after
+                return None
+            self.failures.pop(key, None)
+            if key in self.entries:  # Параллельная загрузка уже положила ресурс
+                return self.entries[key][0]
+            entry = [asset, asset_size(asset), not isinstance(asset, pygame.Surface)]
+            self.entries[key] = entry
+            self.size += entry[1]
+            if not entry[2]:
+                self._convert(entry)
+            self._evict(keep=key)
+            return entry[0]
+
+    def _convert(self, entry):
+        if pygame.display.get_surface() is None:
+            return
+        converted = to_display_format(entry[0])
+        self.size += asset_size(converted) - entry[1]
+        entry[0], entry[1], entry[2] = converted, asset_size(converted), True
+        self.conversions += 1
+
+    def _evict(self, keep=None):
+        """Вытеснение давно не использованных ресурсов сверх бюджета"""
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            key, entry = next(iter(self.entries.items()))
+            if key == keep:
+                break
+            del self.entries[key]
+            self.size -= entry[1]
+            self.evictions += 1
+
+    def discard(self, key):
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.size -= entry[1]
+            self.failures.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.failures.clear()
+            self.size = 0
+
+    def stats(self):
+        """Статистика кэша"""
+        lookups = self.hits + self.misses + self.negative_hits
+        return {
+            'entries': len(self.entries),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'negative_hits': self.negative_hits,
+            'evictions': self.evictions,
+            'conversions': self.conversions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
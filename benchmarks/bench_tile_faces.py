@@ -0,0 +1,67 @@
+"""Сравнение построчной и пакетной (NumPy) генерации лиц плиток
+
+Запуск из корня репозитория:
+    python benchmarks/bench_tile_faces.py --counts 36 360 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from tile_factory import TileFactory, numpy
+from utils import ResourceManager
+
+
+def measure(generate, resource_manager, count, repeat):
+    """Лучшее время генерации из нескольких повторов"""
+    best = None
+    images = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        images = generate(resource_manager, count)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, images
+
+
+def identical(first, second):
+    """Попиксельное совпадение двух наборов изображений"""
+    return first.keys() == second.keys() and all(
+        pygame.image.tostring(first[key], 'RGBA') == pygame.image.tostring(second[key], 'RGBA')
+        for key in first
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк генерации лиц плиток')
+    parser.add_argument('--counts', type=int, nargs='+', default=[36, 360, 1080], help='Число типов плиток')
+    parser.add_argument('--repeat', type=int, default=3, help='Число повторов')
+    args = parser.parse_args()
+
+    if numpy is None:
+        print("NumPy не установлен: пакетная генерация недоступна")
+        return 1
+
+    pygame.init()
+    resource_manager = ResourceManager()
+
+    print(f"{'типов':>8} {'линии, мс':>12} {'массивы, мс':>12} {'ускорение':>10} {'совпадают':>10}")
+    for count in args.counts:
+        lines_time, lines_images = measure(TileFactory.generate_tile_images_lines, resource_manager, count, args.repeat)
+        arrays_time, arrays_images = measure(TileFactory.generate_tile_images_arrays, resource_manager, count, args.repeat)
+        same = identical(lines_images, arrays_images)
+        print(f"{count:>8} {lines_time * 1000:>12.1f} {arrays_time * 1000:>12.1f} "
+              f"{lines_time / arrays_time:>9.1f}x {'да' if same else 'НЕТ':>10}")
+        if not same:
+            return 1
+
+    pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
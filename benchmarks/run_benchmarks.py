@@ -0,0 +1,313 @@
+"""Набор замеров горячих путей игры на синтетических раскладках
+
+Запуск из корня репозитория (используется видеодрайвер SDL dummy):
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --compare bench.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+from constants import *
+from blocking_graph import get_blocking_graph
+from deal import reshuffle_types, search_removal_order
+from game_screen import GameScreen
+from layout_generator import SHAPES
+from replay import ReplayScreen
+from session import GameSession, UNDO, RESHUFFLE
+from tile_factory import TileFactory
+from utils import ResourceManager
+
+DEFAULT_SIZES = [36, 144, 1000, 10000]
+SCAN_LIMIT = 1000  # Полный перебор плиток замеряется только на небольших полях
+
+
+def synthetic_layout(count):
+    """Сетка пирамид 8x4 (слои сдвинуты на полплитки), обрезанная до count плиток"""
+    pyramid = []
+    for z in range(1, 5):
+        shift = z - 1
+        for row in range(4 - shift):
+            for col in range(8 - shift):
+                pyramid.append((col * TILE_WIDTH + shift * TILE_WIDTH // 2,
+                                row * TILE_HEIGHT + shift * TILE_HEIGHT // 2, z))
+
+    layout = []
+    index = 0
+    while len(layout) < count:
+        offset_x = (index % 10) * 9 * TILE_WIDTH
+        offset_y = (index // 10) * 5 * TILE_HEIGHT
+        for x, y, z in pyramid[:count - len(layout)]:
+            layout.append((1, offset_x + x, offset_y + y, z))
+        index += 1
+    return layout
+
+
+def timings(func, repeat):
+    """Длительности вызовов в миллисекундах"""
+    result = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        result.append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'median_ms': statistics.median(ordered),
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'min_ms': ordered[0],
+        'samples': len(ordered),
+    }
+
+
+def make_game(screen, resource_manager, count, shape=None):
+    """GameScreen на синтетической (через файл уровня) или сгенерированной раскладке"""
+    if shape:
+        return GameScreen(screen, resource_manager, filename=f"{GENERATED_LAYOUT_PREFIX}{shape}:{count}", seed=count)
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+        for tile_type, x, y, z in synthetic_layout(count):
+            f.write(f"{tile_type},{x},{y},{z}\n")
+        filename = f.name
+    try:
+        return GameScreen(screen, resource_manager, filename=filename, seed=count)
+    finally:
+        os.unlink(filename)
+
+
+def bench_board(screen, resource_manager, count, repeat, shape=None):
+    results = {}
+
+    start = time.perf_counter()
+    game = make_game(screen, resource_manager, count, shape)
+    results['game_setup'] = summarize([(time.perf_counter() - start) * 1000])
+
+    def full_frame():
+        game.mark_dirty()
+        game.render()
+        game.pop_dirty_rects()
+
+    def idle_frame():
+        game.update()
+        game.render()
+        game.pop_dirty_rects()
+
+    results['render_full'] = summarize(timings(full_frame, repeat))
+    results['render_idle'] = summarize(timings(idle_frame, repeat * 10))
+
+    # Перерисовка всего видимого поля (смена масштаба) и прокрутка на 10 пикселей
+    results['compose_view'] = summarize(timings(lambda: game.view_changed(), repeat))
+    shift = [10]
+
+    def pan_frame():
+        shift[0] = -shift[0]
+        game.pan_view(shift[0], 0)
+        game.render()
+        game.pop_dirty_rects()
+
+    results['pan_frame'] = summarize(timings(pan_frame, repeat * 2))
+
+    # Клик по доступной плитке: выделение и снятие выделения
+    tile = game.tiles[next(iter(game.board.free_tiles))]
+    game.camera.center_on(tile.rect.center)
+    game.view_changed()
+    position = game.camera.rect_to_screen(tile.rect).center
+    results['handle_click'] = summarize(timings(lambda: game.handle_click(position), repeat * 2))
+    game.pop_dirty_rects()
+
+    results['has_available_moves'] = summarize(timings(game.has_available_moves, repeat * 10))
+    results['free_mask'] = summarize(timings(game.store.free_mask, repeat))
+    results['reshuffle_types'] = summarize(timings(
+        lambda: reshuffle_types(game.board_graph, game.store.tile_type, game.store.removed, game.board.free_tiles),
+        repeat))
+    # Перебор, которым перемешивание заканчивается, если все случайные попытки зашли в тупик
+    results['reshuffle_fallback'] = summarize(timings(
+        lambda: search_removal_order(game.board_graph, game.store.removed, game.board.free_tiles), repeat))
+
+    tiles = game.tiles
+    sample = tiles[::max(1, len(tiles) // 100)]
+
+    def graph_queries():
+        for tile in sample:
+            tile.is_covered(tiles)
+            tile.is_blocked(tiles)
+
+    results['is_covered_blocked_x100'] = summarize(timings(graph_queries, repeat))
+
+    if count <= SCAN_LIMIT:
+        def scan_queries():
+            graph, game.store.graph = game.store.graph, None
+            for tile in sample:
+                tile.is_covered(tiles)
+                tile.is_blocked(tiles)
+            game.store.graph = graph
+
+        results['is_covered_blocked_scan_x100'] = summarize(timings(scan_queries, repeat))
+
+    game.hint_worker.invalidate()
+    return results
+
+
+def bench_sessions(screen, resource_manager, filenames):
+    """Записанные партии на экране игры без пауз: ход вместе с перерисовкой"""
+    results = {}
+    for filename in filenames:
+        session = GameSession.load(filename)
+        game = ReplayScreen(screen, resource_manager, session)
+        game.render()
+        game.pop_dirty_rects()
+
+        def play_move(move):
+            _, first, second = move
+            if first == UNDO:
+                game.undo()
+            elif first == RESHUFFLE:
+                game.reshuffle(second)
+            else:
+                game.remove_pair(game.tiles[first], game.tiles[second])
+            game.render()
+            game.pop_dirty_rects()
+
+        samples = []
+        for move in session.moves:
+            start = time.perf_counter()
+            play_move(move)
+            samples.append((time.perf_counter() - start) * 1000)
+        if samples:
+            results[f"replay_move[{os.path.basename(filename)}]"] = summarize(samples)
+        game.hint_worker.invalidate()
+    return results
+
+
+def bench_reshuffle_budget(repeat):
+    """Перебор порядка снятия на неразбираемом поле (башня и одиночные плитки): весь бюджет RESHUFFLE_NODE_LIMIT"""
+    positions = [(0, 0, z) for z in range(1, 601)]
+    positions += [(200 + 60 * (i % 100), 100 * (i // 100), 1) for i in range(400)]
+    graph = get_blocking_graph(positions)
+    removed = bytearray(len(positions))
+    return {'reshuffle_fallback_budget': summarize(timings(lambda: search_removal_order(graph, removed), repeat))}
+
+
+def bench_startup(repeat):
+    """Холодный запуск main() в отдельном процессе: весь процесс и время до первого кадра"""
+    samples = []
+    first_frame = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), '--max-frames', '1'],
+                                 cwd=tempfile.gettempdir(), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                 env=dict(os.environ), check=False, text=True)
+        samples.append((time.perf_counter() - start) * 1000)
+        for line in process.stdout.splitlines():
+            if line.startswith('Время до первого кадра:'):
+                first_frame.append(float(line.split(':')[1].split()[0]))
+
+    results = {'main_startup': summarize(samples)}
+    if first_frame:
+        results['time_to_first_frame'] = summarize(first_frame)
+    return results
+
+
+def run(sizes, repeat, startup_repeat, sessions=(), shape=None):
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    resource_manager = ResourceManager()
+
+    results = {}
+    for count in sizes:
+        label = f"{shape}-{count}" if shape else count
+        for name, stats in bench_board(screen, resource_manager, count, repeat, shape).items():
+            results[f"{name}[{label}]"] = stats
+
+    results.update(bench_sessions(screen, resource_manager, sessions))
+    results.update(bench_reshuffle_budget(repeat))
+
+    results['create_tile_images_generate'] = summarize(
+        timings(lambda: TileFactory.generate_tile_images(resource_manager), repeat))
+    results['create_tile_images_cached'] = summarize(
+        timings(lambda: TileFactory.create_tile_images(resource_manager), repeat))
+
+    pygame.quit()
+
+    if startup_repeat:
+        results.update(bench_startup(startup_repeat))
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'sizes': sizes,
+            'shape': shape,
+            'repeat': repeat,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Сравнение медиан с базовым прогоном: список регрессий"""
+    regressions = []
+    print(f"{'замер':<40} {'база, мс':>10} {'сейчас, мс':>11} {'изменение':>10}")
+    for name, stats in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<40} {'-':>10} {stats['median_ms']:>11.3f} {'новый':>10}")
+            continue
+        change = stats['median_ms'] / base['median_ms'] - 1 if base['median_ms'] > 0 else 0.0
+        flag = "  РЕГРЕССИЯ" if change > threshold else ""
+        print(f"{name:<40} {base['median_ms']:>10.3f} {stats['median_ms']:>11.3f} {change:>+10.1%}{flag}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарки маджонга')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Размеры раскладок')
+    parser.add_argument('--repeat', type=int, default=20, help='Число повторов замера')
+    parser.add_argument('--startup-repeat', type=int, default=3, help='Число холодных запусков main()')
+    parser.add_argument('--shape', choices=sorted(SHAPES),
+                        help='Сгенерированные раскладки этой формы вместо сетки пирамид')
+    parser.add_argument('--sessions', nargs='+', default=[], metavar='FILE',
+                        help='Записи партий (main.py --record) для замера ходов')
+    parser.add_argument('--output', help='Файл для результатов в JSON')
+    parser.add_argument('--compare', help='Базовый JSON для поиска регрессий')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Допустимое замедление медианы (доля)')
+    args = parser.parse_args()
+
+    current = run(args.sizes, args.repeat, args.startup_repeat, args.sessions, args.shape)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"Регрессий: {len(regressions)}")
+            return 1
+    elif not args.output:
+        print(json.dumps(current, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
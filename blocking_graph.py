@@ -0,0 +1,134 @@
+import random
+import profiler
+from constants import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class BlockingGraph:
+    """Статический граф блокировок раскладки: кто кого накрывает и подпирает сбоку"""
+
+    def __init__(self, positions):
+        # positions - список (x, y, z) в порядке плиток раскладки
+        self.positions = tuple(positions)
+        count = len(self.positions)
+
+        self.covered_by = [[] for _ in range(count)]  # кто накрывает плитку
+        self.covers = [[] for _ in range(count)]  # кого накрывает плитка
+        self.left = [[] for _ in range(count)]  # соседи слева на том же слое
+        self.right = [[] for _ in range(count)]  # соседи справа на том же слое
+
+        self._compile()
+
+        # Плитки, чья доступность может измениться при снятии данной
+        self.dependents = [
+            tuple(self.covers[i] + self.left[i] + self.right[i]) for i in range(count)
+        ]
+        self.covered_by = [tuple(items) for items in self.covered_by]
+        self.covers = [tuple(items) for items in self.covers]
+        self.left = [tuple(items) for items in self.left]
+        self.right = [tuple(items) for items in self.right]
+        self._edge_arrays = {}
+        self._search_keys = None
+
+    def __len__(self):
+        return len(self.positions)
+
+    def _compile(self):
+        """Построение графа через пространственную сетку (без сравнения всех пар)"""
+        cell_w = TILE_WIDTH + TILE_GAP
+        cell_h = TILE_HEIGHT
+
+        # Координаты на экране отличаются от раскладки сдвигом на z * 5,
+        # именно по ним проверялось перекрытие в Tile.is_covered_by
+        screen_pos = [(x - z * 5, y - z * 5, z) for x, y, z in self.positions]
+
+        grid = {}
+        for i, (sx, sy, _) in enumerate(screen_pos):
+            grid.setdefault((sx // cell_w, sy // cell_h), []).append(i)
+
+        for i, (sx, sy, z) in enumerate(screen_pos):
+            cx, cy = sx // cell_w, sy // cell_h
+            for gx in (cx - 1, cx, cx + 1):
+                for gy in (cy - 1, cy, cy + 1):
+                    for j in grid.get((gx, gy), ()):
+                        if j == i:
+                            continue
+                        ox, oy, oz = screen_pos[j]
+                        dx = ox - sx
+                        dy = oy - sy
+                        if abs(dy) >= TILE_HEIGHT:
+                            continue
+
+                        if oz > z and abs(dx) < TILE_WIDTH:
+                            self.covered_by[i].append(j)
+                            self.covers[j].append(i)
+                        elif oz == z and 0 < dx <= TILE_WIDTH + TILE_GAP:
+                            self.right[i].append(j)
+                            self.left[j].append(i)
+
+    def edge_arrays(self, relation):
+        """Рёбра отношения ('covered_by', 'left', 'right') как пара массивов NumPy (плитка, сосед)"""
+        arrays = self._edge_arrays.get(relation)
+        if arrays is None:
+            lists = getattr(self, relation)
+            sizes = numpy.fromiter((len(items) for items in lists), dtype=numpy.intp, count=len(lists))
+            tiles = numpy.repeat(numpy.arange(len(lists), dtype=numpy.intp), sizes)
+            others = numpy.fromiter((other for items in lists for other in items), dtype=numpy.intp,
+                                    count=int(sizes.sum()))
+            arrays = self._edge_arrays[relation] = (tiles, others)
+        return arrays
+
+    def search_keys(self):
+        """Приоритеты плиток и 64-битные ключи состояний для перебора порядка снятия
+
+        Приоритет меньше у плитки, которая открывает больше других (при равенстве -
+        у плитки с меньшим номером). Ключ состояния - XOR ключей снятых плиток;
+        ключи берутся из генератора с постоянным зерном, так что перебор
+        воспроизводим.
+        """
+        if self._search_keys is None:
+            count = len(self.positions)
+            rng = random.Random(count)
+            priority = [-len(dependents) * count + index for index, dependents in enumerate(self.dependents)]
+            keys = [rng.getrandbits(64) for _ in range(count)]
+            self._search_keys = priority, keys
+        return self._search_keys
+
+    def is_covered(self, index, removed):
+        """Накрыта ли плитка (removed - последовательность флагов снятых плиток)"""
+        for other in self.covered_by[index]:
+            if not removed[other]:
+                return True
+        return False
+
+    def is_side_blocked(self, index, removed):
+        """Зажата ли плитка соседями с обеих сторон"""
+        if not SIDE_BLOCKING:
+            return False
+        left = any(not removed[other] for other in self.left[index])
+        return left and any(not removed[other] for other in self.right[index])
+
+    def is_free(self, index, removed):
+        """Доступна ли плитка для хода"""
+        if profiler.ENABLED:
+            profiler.count('is_free')
+        return (not removed[index]
+                and not self.is_covered(index, removed)
+                and not self.is_side_blocked(index, removed))
+
+
+_graph_cache = {}
+
+
+def get_blocking_graph(positions):
+    """Получение графа раскладки (компилируется один раз на раскладку)"""
+    key = tuple(positions)
+    graph = _graph_cache.get(key)
+    if graph is None:
+        graph = BlockingGraph(key)
+        _graph_cache[key] = graph
+    return graph
@@ -0,0 +1,94 @@
+class Board:
+    """Состояние партии: живое множество доступных плиток и счётчики по типам"""
+
+    def __init__(self, store, graph):
+        self.store = store
+        self.graph = graph
+        self.tile_types = store.tile_type
+        self.removed = store.removed  # Флаги снятых плиток общие с хранилищем
+        self.remaining = len(store) - sum(self.removed)
+        self.mask = sum(1 << index for index, removed in enumerate(self.removed) if removed)
+
+        self.free_tiles = set()
+        self.free_counts = {}  # tile_type -> число доступных плиток
+        self.pair_types = 0  # число типов, у которых доступна хотя бы пара
+
+        # Начальная доступность считается по всему полю сразу
+        for index, free in enumerate(store.free_mask(graph)):
+            if free:
+                self._add_free(index)
+
+    def _add_free(self, index):
+        self.free_tiles.add(index)
+        tile_type = self.tile_types[index]
+        count = self.free_counts.get(tile_type, 0) + 1
+        self.free_counts[tile_type] = count
+        if count == 2:
+            self.pair_types += 1
+
+    def _discard_free(self, index):
+        self.free_tiles.discard(index)
+        tile_type = self.tile_types[index]
+        count = self.free_counts[tile_type] - 1
+        self.free_counts[tile_type] = count
+        if count == 1:
+            self.pair_types -= 1
+
+    def _refresh(self, index):
+        """Пересчёт доступности одной плитки"""
+        free = self.graph.is_free(index, self.removed)
+        if free and index not in self.free_tiles:
+            self._add_free(index)
+        elif not free and index in self.free_tiles:
+            self._discard_free(index)
+
+    def is_free(self, index):
+        """Доступна ли плитка для хода"""
+        return index in self.free_tiles
+
+    def remove_pair(self, first, second):
+        """Снятие пары и обновление только затронутых плиток"""
+        self.store.remove_pair(first, second)
+        for index in (first, second):
+            if index in self.free_tiles:
+                self._discard_free(index)
+        self.remaining -= 2
+        self.mask |= (1 << first) | (1 << second)
+
+        for index in (first, second):
+            for other in self.graph.dependents[index]:
+                if not self.removed[other]:
+                    self._refresh(other)
+
+    def restore_pair(self, first, second):
+        """Возврат снятой пары (отмена хода) с обновлением только затронутых плиток"""
+        self.store.restore_pair(first, second)
+        self.remaining += 2
+        self.mask &= ~((1 << first) | (1 << second))
+
+        for index in (first, second):
+            self._refresh(index)
+            for other in self.graph.dependents[index]:
+                if not self.removed[other]:
+                    self._refresh(other)
+
+    def retype(self, tile_types):
+        """Новые типы оставшихся плиток (перемешивание): доступность не меняется, пересчитываются счётчики"""
+        for index in range(len(self.store)):
+            if not self.removed[index]:
+                self.tile_types[index] = tile_types[index]
+
+        free_tiles = self.free_tiles
+        self.free_tiles = set()
+        self.free_counts = {}
+        self.pair_types = 0
+        for index in free_tiles:
+            self._add_free(index)
+
+    def has_available_moves(self):
+        """Есть ли хотя бы одна доступная пара"""
+        return self.pair_types > 0
+
+    def is_cleared(self):
+        """Сняты ли все плитки"""
+        return self.remaining == 0
@@ -0,0 +1,124 @@
+import math
+import pygame
+from constants import *
+
+
+class Camera:
+    """Камера поля: масштаб из ZOOM_LEVELS и сдвиг
+
+    Плитки хранят координаты поля (TileStore.rect_x/rect_y), на экран они
+    переводятся как round(координата * zoom) - сдвиг. Сдвиг целый, поэтому при
+    прокрутке все плитки смещаются ровно на столько же пикселей, а при масштабе 1
+    и нулевом сдвиге экран совпадает с полем.
+    """
+
+    def __init__(self, view, zoom=1.0):
+        self.view = pygame.Rect(view)  # Область экрана, в которой видно поле
+        self.zoom = zoom
+        self.offset_x = 0
+        self.offset_y = 0
+
+    def to_screen(self, point):
+        x, y = point
+        return round(x * self.zoom) - self.offset_x, round(y * self.zoom) - self.offset_y
+
+    def to_world(self, point):
+        x, y = point
+        return (x + self.offset_x) / self.zoom, (y + self.offset_y) / self.zoom
+
+    def scale(self, length):
+        """Длина на экране при текущем масштабе"""
+        return round(length * self.zoom)
+
+    def rect_to_screen(self, rect):
+        """Область поля на экране (размер плитки одинаков для всех плиток при данном масштабе)"""
+        x, y = self.to_screen(rect[:2])
+        return pygame.Rect(x, y, self.scale(rect[2]), self.scale(rect[3]))
+
+    def rect_to_world(self, rect):
+        """Область поля, которую занимает область экрана (с округлением наружу)"""
+        left, top = self.to_world(rect[:2])
+        right, bottom = self.to_world((rect[0] + rect[2], rect[1] + rect[3]))
+        left, top = math.floor(left), math.floor(top)
+        return pygame.Rect(left, top, math.ceil(right) - left, math.ceil(bottom) - top)
+
+    def pan(self, dx, dy):
+        """Сдвиг изображения поля на экране на (dx, dy) пикселей"""
+        self.offset_x -= dx
+        self.offset_y -= dy
+
+    def center_on(self, point):
+        """Точка поля в центре области камеры"""
+        x, y = point
+        self.offset_x = round(x * self.zoom) - self.view.centerx
+        self.offset_y = round(y * self.zoom) - self.view.centery
+
+    def set_zoom(self, zoom, anchor=None):
+        """Смена масштаба с неподвижной точкой экрана anchor (по умолчанию - центр области)"""
+        anchor = anchor or self.view.center
+        world = self.to_world(anchor)
+        self.zoom = zoom
+        self.offset_x = round(world[0] * zoom) - anchor[0]
+        self.offset_y = round(world[1] * zoom) - anchor[1]
+
+    def zoom_step(self, steps, anchor=None):
+        """Переход на соседний уровень масштаба (steps > 0 - крупнее); False, если дальше некуда"""
+        levels = ZOOM_LEVELS
+        current = min(range(len(levels)), key=lambda i: abs(levels[i] - self.zoom))
+        target = min(max(current + steps, 0), len(levels) - 1)
+        if levels[target] == self.zoom:
+            return False
+        self.set_zoom(levels[target], anchor)
+        return True
+
+    def fit(self, bounds, margin=10, max_zoom=1.0):
+        """Наибольший масштаб (не крупнее max_zoom), при котором область поля bounds видна целиком
+
+        Камера центрируется на bounds. Если поле не помещается даже при самом
+        мелком масштабе, остаётся самый мелкий."""
+        bounds = pygame.Rect(bounds)
+        width, height = self.view.width - 2 * margin, self.view.height - 2 * margin
+        zoom = ZOOM_LEVELS[0]
+        for level in ZOOM_LEVELS:
+            if level <= max_zoom and bounds.width * level <= width and bounds.height * level <= height:
+                zoom = level
+        self.zoom = zoom
+        self.center_on(bounds.center)
+
+
+class VisibilityGrid:
+    """Пространственный индекс областей плиток: какие плитки попадают в область поля
+
+    Области раскладываются по клеткам сетки, так что запрос стоит пропорционально
+    числу плиток рядом с областью, а не всему полю.
+    """
+
+    CELL = 256  # Размер клетки в координатах поля
+
+    def __init__(self, rects):
+        self.rects = [pygame.Rect(rect) for rect in rects]
+        self.cells = {}
+        for index, rect in enumerate(self.rects):
+            for cell in self._cells(rect):
+                self.cells.setdefault(cell, []).append(index)
+
+    def _cells(self, rect):
+        cell = self.CELL
+        for cx in range(rect.left // cell, (rect.right - 1) // cell + 1):
+            for cy in range(rect.top // cell, (rect.bottom - 1) // cell + 1):
+                yield cx, cy
+
+    def query(self, rect):
+        """Номера областей, пересекающих rect, по возрастанию (то есть в порядке отрисовки)"""
+        rect = pygame.Rect(rect)
+        found = set()
+        for cell in self._cells(rect):
+            found.update(self.cells.get(cell, ()))
+        rects = self.rects
+        return sorted(index for index in found if rects[index].colliderect(rect))
+
+    def bounds(self):
+        """Область поля, которую занимают все плитки"""
+        if not self.rects:
+            return pygame.Rect(0, 0, 0, 0)
+        return self.rects[0].unionall(self.rects[1:])
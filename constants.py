@@ -18,14 +18,45 @@ TILE_WIDTH = 80
 TILE_HEIGHT = 100
 TILE_THICKNESS = 20
 TILE_GAP = 5
+TILE_TYPES = 36  # Число различных типов плиток
+
+# Игрок и раскладка по умолчанию (ключи статистики)
+DEFAULT_PLAYER = 'Игрок'
+DEFAULT_LAYOUT_KEY = 'layout1'
+
+# Правила
+SIDE_BLOCKING = False  # Классическое правило: плитка, зажатая с двух сторон, недоступна
+RESHUFFLE_ATTEMPTS = 20  # Случайных попыток разобрать оставшиеся плитки при перемешивании
+RESHUFFLE_NODE_LIMIT = 800  # Бюджет перебора, если все попытки зашли в тупик (ходы и кандидаты, укладывается в кадр)
 
 # Пути к ресурсам
 RESOURCES_DIR = 'res'
 TILES_DIR = os.path.join(RESOURCES_DIR, 'tiles')
 FONT_FILE = os.path.join(RESOURCES_DIR, 'C_BOX.TTF')
 MENU_BG = os.path.join(RESOURCES_DIR, 'menu_bg.png')
-BEST_TIME_FILE = 'best_time.txt'
+BEST_TIME_FILE = 'best_time.txt'  # Прежний файл рекорда (переносится в STATS_FILE)
+STATS_FILE = 'stats.db'
 MUSIC_FILE = os.path.join(RESOURCES_DIR, 'background_music.mp3')
+CACHE_DIR = '.cache'
+TILE_CACHE_IMAGE = os.path.join(CACHE_DIR, 'tiles.png')
+TILE_CACHE_MANIFEST = os.path.join(CACHE_DIR, 'tiles.json')
+LAYOUT_PACK_EXT = '.mjl'  # Бинарный пакет раскладок (layout_pack.py)
+GENERATED_LAYOUT_PREFIX = '@'  # Ссылка на сгенерированную раскладку: '@форма:число плиток[:зерно]'
+
+# Загрузка ресурсов
+PRELOAD_WORKERS = 2  # Потоки фоновой загрузки
+ASSET_CACHE_BYTES = 64 * 1024 * 1024  # Бюджет памяти кэша шрифтов и изображений
+ASSET_RETRY_SECONDS = 5.0  # Через сколько повторять неудавшуюся загрузку
+TEXT_CACHE_ENTRIES = 256  # Сколько отрисованных надписей хранить
+
+# Камера поля
+ZOOM_LEVELS = (0.25, 0.35, 0.5, 0.7, 1.0, 1.4, 2.0)  # Уровни масштаба (для каждого - своя копия атласа)
+PAN_STEP = 80  # Сдвиг поля стрелками, пикселей экрана
+
+# Темп кадров
+IDLE_MAX_WAIT = 1.0  # Самое долгое ожидание событий в простое, с
+IDLE_POLL_INTERVAL = 0.02  # Как часто проверять очередь событий в простое, с
+PRELOAD_POLL_INTERVAL = 0.05  # Как часто проверять фоновую загрузку в простое, с
 
 # Конфигурация раскладок
 CUSTOM_LAYOUTS = [
@@ -0,0 +1,244 @@
+import heapq
+import random
+from constants import *
+
+
+def even_positions(positions):
+    """Позиции раскладки с чётным числом плиток (лишней становится самая верхняя)"""
+    positions = list(positions)
+    if len(positions) % 2:
+        top = max(range(len(positions)), key=lambda i: (positions[i][2], i))
+        del positions[top]
+    return positions
+
+
+def removal_order(graph, rng, removed=None, free_tiles=None):
+    """Случайный порядок снятия всех плиток парами доступных плиток (None - тупик)
+
+    removed - уже снятые плитки, free_tiles - уже известные доступные плитки
+    (Board.free_tiles), чтобы не проверять всё поле заново.
+    """
+    count = len(graph)
+    removed = bytearray(removed) if removed is not None else bytearray(count)
+    target = count - sum(removed)
+
+    # Список доступных плиток с позициями для удаления за O(1)
+    free = []
+    slot = {}
+
+    def add(index):
+        slot[index] = len(free)
+        free.append(index)
+
+    def discard(index):
+        position = slot.pop(index)
+        last = free.pop()
+        if last != index:
+            free[position] = last
+            slot[last] = position
+
+    if free_tiles is None:
+        free_tiles = [index for index in range(count) if not removed[index] and graph.is_free(index, removed)]
+    for index in sorted(free_tiles):
+        add(index)
+
+    order = []
+    while len(order) < target:
+        if len(free) < 2:
+            return None
+
+        first = free[rng.randrange(len(free))]
+        discard(first)
+        second = free[rng.randrange(len(free))]
+        discard(second)
+
+        for index in (first, second):
+            removed[index] = 1
+            order.append(index)
+
+        for index in (first, second):
+            for other in graph.dependents[index]:
+                if removed[other]:
+                    continue
+                is_free = graph.is_free(other, removed)
+                if is_free and other not in slot:
+                    add(other)
+                elif not is_free and other in slot:
+                    discard(other)
+
+    return order
+
+
+def search_removal_order(graph, removed, free_tiles=None, node_limit=RESHUFFLE_NODE_LIMIT):
+    """Порядок снятия оставшихся плиток перебором с возвратами (None - не найден за node_limit ходов)
+
+    Типы не учитываются: снять можно любые две доступные плитки. Первой в паре
+    берётся доступная плитка, которая открывает больше всего других, второй
+    перебираются остальные доступные. Тупиковые состояния запоминаются по
+    64-битному ключу (BlockingGraph.search_keys). Бюджет node_limit считается в
+    ходах и кандидатах на вторую плитку, так что время перебора ограничено
+    независимо от размера поля. Если для разбора без единого возврата нужно
+    больше node_limit ходов, перебор не начинается.
+    """
+    count = len(graph)
+    removed = bytearray(removed)
+    remaining = count - sum(removed)
+    if remaining // 2 > node_limit:
+        return None
+    if free_tiles is None:
+        free_tiles = [index for index in range(count) if not removed[index] and graph.is_free(index, removed)]
+    free = set(free_tiles)
+    priority, keys = graph.search_keys()
+
+    # Куча доступных плиток по приоритету; ставшие недоступными выбрасываются при извлечении
+    heap = [(priority[index], index) for index in free]
+    heapq.heapify(heap)
+    queued = set(free)
+
+    def push(index):
+        if index not in queued:
+            queued.add(index)
+            heapq.heappush(heap, (priority[index], index))
+
+    def top():
+        while heap and heap[0][1] not in free:
+            queued.discard(heapq.heappop(heap)[1])
+        return heap[0][1]
+
+    def take(first, second):
+        for index in (first, second):
+            removed[index] = 1
+            free.discard(index)
+        for index in (first, second):
+            for other in graph.dependents[index]:
+                if not removed[other] and other not in free and graph.is_free(other, removed):
+                    free.add(other)
+                    push(other)
+
+    def put_back(first, second):
+        for index in (first, second):
+            removed[index] = 0
+            free.add(index)
+            push(index)
+        for index in (first, second):
+            for other in graph.dependents[index]:
+                if other in free and not graph.is_free(other, removed):
+                    free.discard(other)
+
+    def choices():
+        """Кадр перебора [первая, вторая, кандидаты, позиция] (None - тупик)
+
+        Вторая - лучшая после первой; остальные кандидаты сортируются, только
+        если она не подошла."""
+        if len(free) < 2 or state in dead:
+            return None
+        first = top()
+        entry = heapq.heappop(heap)
+        second = top()
+        heapq.heappush(heap, entry)
+        return [first, second, None, 0]
+
+    order = []
+    frames = []
+    dead = set()  # Ключи тупиковых состояний
+    state = 0
+    nodes = 0
+    frame = choices()
+    while len(order) < remaining:
+        if frame is not None and frame[2] is None and frame[3]:
+            frame[2] = sorted((index for index in free if index != frame[0]), key=priority.__getitem__)
+            nodes += len(frame[2])  # Сортировка кандидатов тоже расходует бюджет
+        if frame is None or (frame[2] is not None and frame[3] >= len(frame[2])):
+            # Из этого состояния доска не разбирается - возврат на ход назад
+            if not frames:
+                return None
+            dead.add(state)
+            frame = frames.pop()
+            first, second = order[-2:]
+            del order[-2:]
+            put_back(first, second)
+            state ^= keys[first] ^ keys[second]
+            continue
+
+        nodes += 1
+        if nodes > node_limit:
+            return None
+        first = frame[0]
+        second = frame[1] if frame[2] is None else frame[2][frame[3]]
+        frame[3] += 1
+        take(first, second)
+        order += (first, second)
+        state ^= keys[first] ^ keys[second]
+        frames.append(frame)
+        frame = choices()
+
+    return order
+
+
+def deal_solvable(graph, seed=None, type_count=TILE_TYPES, attempts=100):
+    """Раздача типов по всем позициям раскладки с гарантией хотя бы одного решения
+
+    Снятие плиток моделируется с полного поля: каждая пара плиток, одновременно
+    доступных на каком-то шаге, получает один тип. Смоделированный порядок снятия
+    пар и есть решение. Возвращает список типов в порядке позиций графа.
+    """
+    rng = random.Random(seed)
+    count = len(graph)
+
+    pair_types = [pair % type_count + 1 for pair in range(count // 2)]
+    rng.shuffle(pair_types)
+
+    order = None
+    for _ in range(attempts):
+        order = removal_order(graph, rng)
+        if order is not None:
+            break
+
+    if order is None:
+        # Раскладка не разбирается ни в каком порядке - раздаём без гарантии
+        order = list(range(count))
+        rng.shuffle(order)
+
+    tile_types = [0] * count
+    for pair, tile_type in enumerate(pair_types):
+        tile_types[order[2 * pair]] = tile_type
+        tile_types[order[2 * pair + 1]] = tile_type
+    return tile_types
+
+
+def reshuffle_types(graph, tile_types, removed, free_tiles=None, seed=None,
+                    attempts=RESHUFFLE_ATTEMPTS, node_limit=RESHUFFLE_NODE_LIMIT):
+    """Перемешивание типов оставшихся плиток по их позициям с гарантией решения
+
+    Оставшиеся пары типов раздаются так же, как в deal_solvable, но порядок снятия
+    моделируется с текущего состояния поля. Если все случайные попытки зашли в
+    тупик, порядок ищется ограниченным перебором (search_removal_order).
+    Возвращает новый список типов или None, если порядок снятия не найден.
+    """
+    rng = random.Random(seed)
+    counts = {}
+    for index, tile_type in enumerate(tile_types):
+        if not removed[index]:
+            counts[tile_type] = counts.get(tile_type, 0) + 1
+    if any(count % 2 for count in counts.values()):
+        return None
+
+    pair_types = [tile_type for tile_type, count in sorted(counts.items()) for _ in range(count // 2)]
+    rng.shuffle(pair_types)
+
+    order = None
+    for _ in range(attempts):
+        order = removal_order(graph, rng, removed, free_tiles)
+        if order is not None:
+            break
+
+    if order is None:
+        order = search_removal_order(graph, removed, free_tiles, node_limit)
+        if order is None:
+            return None
+
+    tile_types = list(tile_types)
+    for pair, tile_type in enumerate(pair_types):
+        tile_types[order[2 * pair]] = tile_type
+        tile_types[order[2 * pair + 1]] = tile_type
+    return tile_types
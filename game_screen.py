@@ -1,100 +1,259 @@
 import pygame
 import random
 import time
+import profiler
 from screen import BaseScreen
-from tile import Tile
+from tile_store import TileStore
 from tile_factory import TileFactory
+from blocking_graph import get_blocking_graph
+from board import Board
+from camera import Camera, VisibilityGrid
+from deal import deal_solvable, even_positions, reshuffle_types
+from hint_worker import HintWorker
+from move_history import MoveHistory
+from solver import UNSOLVABLE
 from constants import *
-from utils import TimeManager, load_best_time, save_best_time
+from utils import TimeManager, read_layout_file, layout_positions
+from session import GameSession
+from stats_store import get_stats_store
+from layout_generator import is_generated_layout
+from layout_pack import is_layout_pack
 
 
 class GameScreen(BaseScreen):
     """Экран игры"""
 
-    def __init__(self, screen, resource_manager, player_name="Игрок", editor=False, filename=None, layout_index=0):
+    # Область надписи с временем игры (перерисовывается раз в секунду)
+    TIMER_RECT = pygame.Rect(0, SCREEN_HEIGHT - 50, SCREEN_WIDTH // 2, 50)
+    # Область сообщений подсказки в верхней панели
+    STATUS_RECT = pygame.Rect(SCREEN_WIDTH // 3, 0, SCREEN_WIDTH // 3, 50)
+    # Поле между панелями сверху и снизу (плитки рисуются только в нём)
+    FIELD_RECT = pygame.Rect(0, 50, SCREEN_WIDTH, SCREEN_HEIGHT - 100)
+    AUTO_PLAY_DELAY = 0.25  # Пауза между ходами автоигры, с
+    RECORD_STATS = True  # Учитывать партии в статистике игрока
+    STATUS_TEXTS = ("Думаю...", "Решения нет", "Решение не найдено", "Автоигра", "Перемешать нельзя")
+    GAME_OVER_HINTS = ("Нажмите R для рестарта", "ESC для выхода в меню", "N для смены раскладки")
+    UNDO_HINT = "Z - отменить ход"
+    RESHUFFLE_HINT = "F - перемешать плитки"
+
+    def __init__(self, screen, resource_manager, player_name=DEFAULT_PLAYER, editor=False, filename=None,
+                 layout_index=0, seed=None, stats=None, record_dir=None):
         super().__init__(screen, resource_manager)
         self.player_name = player_name
         self.editor = editor
         self.filename = filename
         self.layout_index = layout_index
         self.time_manager = TimeManager()
+        self.stats = stats or get_stats_store()
+        self.record_dir = record_dir  # Каталог для записей партий (None - не сохранять)
+        self.session = None
         self.tile_factory = TileFactory()
-        self.tile_images = self.tile_factory.create_tile_images(resource_manager)
-        self.reset_game()
-        self.best_time = load_best_time()
-
-    def reset_game(self):
-        """Сброс игры"""
+        self.tile_atlas = self.tile_factory.create_tile_atlas(resource_manager)
+        self.hint_worker = HintWorker()
+        self.camera = Camera(self.FIELD_RECT)
+        self.prerender_labels([(f"Игрок: {player_name}", self.small_font)]
+                              + [(text, self.small_font, COLOR_YELLOW) for text in self.STATUS_TEXTS]
+                              + [(text, self.small_font) for text in self.GAME_OVER_HINTS + (self.UNDO_HINT, self.RESHUFFLE_HINT)]
+                              + [("Игра окончена", None, COLOR_RED), ("Новый рекорд!", None, COLOR_YELLOW)])
+        self.reset_game(seed)
+
+    def reset_game(self, seed=None):
+        """Сброс игры (seed - зерно раздачи, None - случайное)"""
+        self.end_session()
+        self.deal_seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.session = GameSession(self.deal_seed, self.layout_index, self.filename, self.player_name)
+        self.stats_recorded = False
+        self.history = MoveHistory()
+        self.store = TileStore()
         self.tiles = []
         self.selected_tile = None
         self.time_manager.reset()
         self.time_manager.start()
         self.game_over = False
         self.win = False
-
-        if self.editor and self.filename:
+        self.shown_time = None
+        self.hint_tiles = ()
+        self.hint_requested = False
+        self.auto_play = False
+        self.next_auto_move = 0
+        self.status_text = ""
+        self.best_time = self.stats.best_time(self.player_name, self.layout_key)
+        self.mark_dirty()
+
+        if self.filename:
             self.load_layout()
         else:
             self.generate_layout()
 
+        self.attach_graph()
+
+    @property
+    def layout_key(self):
+        """Ключ раскладки в статистике: файл уровня или номер встроенной раскладки"""
+        if self.filename:
+            return self.filename
+        return f"layout{self.layout_index + 1}"
+
+    def attach_graph(self):
+        """Привязка плиток к графу блокировок раскладки"""
+        self.tiles = self.store.tiles()
+        self.board_graph = get_blocking_graph(self.store.positions())
+        self.store.graph = self.board_graph
+        self.board = Board(self.store, self.board_graph)
+        self.hint_worker.set_board(self.board)
+        self.tile_atlas.ensure_faces(set(self.store.tile_type))
+        self.draw_order = sorted(self.tiles, key=lambda t: (t.z, t.y, t.x))
+        # Запас в пару пикселей покрывает округление координат при масштабировании
+        self.visibility = VisibilityGrid(tile.get_bounds().inflate(2, 2) for tile in self.draw_order)
+        self.reset_camera()
+        self.build_board_layer()
+
+    def reset_camera(self):
+        """Поле, помещающееся между панелями, показывается как есть, остальное - целиком в мелком масштабе"""
+        bounds = self.visibility.bounds()
+        if self.camera.view.contains(bounds):
+            self.camera.zoom = 1.0
+            self.camera.offset_x = self.camera.offset_y = 0
+        else:
+            self.camera.fit(bounds)
+
+    def build_board_layer(self):
+        """Построение закэшированного слоя поля: фон, панели и плитки без выделения"""
+        if profiler.ENABLED:
+            profiler.count('surface')
+        self.board_layer = pygame.Surface(self.screen.get_size())
+        if pygame.display.get_surface() is not None:
+            self.board_layer = self.board_layer.convert()
+        self.field_layer = self.board_layer.subsurface(self.FIELD_RECT)  # Прокручивается камерой
+        self.compose_board_layer(self.board_layer.get_rect())
+
+    def compose_board_layer(self, rect):
+        """Перерисовка области слоя поля в порядке художника (только плитки, видимые в этой области)"""
+        self.board_layer.set_clip(rect)
+        self.render_background(self.board_layer)
+        rect = rect.clip(self.FIELD_RECT)
+        if not rect:
+            self.board_layer.set_clip(None)
+            return
+
+        self.board_layer.set_clip(rect)
+        atlas = self.tile_atlas.scaled(self.camera.zoom)
+        for index in self.visibility.query(self.camera.rect_to_world(rect)):
+            tile = self.draw_order[index]
+            if not tile.removed:
+                tile.draw(self.board_layer, atlas, with_selection=False, camera=self.camera)
+        self.board_layer.set_clip(None)
+
+    def tile_bounds(self, tile):
+        """Область экрана, которую занимает плитка при текущей камере"""
+        return tile.get_bounds(self.camera)
+
+    def view_changed(self, dx=None, dy=None):
+        """Перерисовка слоя поля после движения камеры
+
+        При прокрутке на (dx, dy) поле в слое сдвигается целиком, а заново рисуются
+        только открывшиеся полосы.
+        """
+        field = self.FIELD_RECT
+        if dx is None or abs(dx) >= field.width or abs(dy) >= field.height:
+            self.compose_board_layer(self.board_layer.get_rect())
+        else:
+            self.field_layer.scroll(dx, dy)
+            if dx:
+                self.compose_board_layer(pygame.Rect(field.left if dx > 0 else field.right + dx, field.top,
+                                                     abs(dx), field.height))
+            if dy:
+                self.compose_board_layer(pygame.Rect(field.left, field.top if dy > 0 else field.bottom + dy,
+                                                     field.width, abs(dy)))
+        self.mark_dirty(field)
+
+    def pan_view(self, dx, dy):
+        """Прокрутка поля на (dx, dy) пикселей экрана"""
+        if dx or dy:
+            self.camera.pan(dx, dy)
+            self.view_changed(dx, dy)
+
+    def zoom_view(self, steps, anchor=None):
+        """Смена уровня масштаба с неподвижной точкой anchor"""
+        if self.camera.zoom_step(steps, anchor):
+            self.view_changed()
+
+    def handle_camera_input(self, event):
+        """Колесо мыши - масштаб, перетаскивание правой или средней кнопкой и стрелки - прокрутка,
+        +/- - масштаб, 0 - всё поле. Возвращает True, если событие относилось к камере"""
+        if event.type == pygame.MOUSEWHEEL:
+            self.zoom_view(event.y, pygame.mouse.get_pos())
+            return True
+        if event.type == pygame.MOUSEMOTION and (event.buttons[1] or event.buttons[2]):
+            self.pan_view(*event.rel)
+            return True
+        if event.type != pygame.KEYDOWN:
+            return False
+
+        arrows = {pygame.K_LEFT: (PAN_STEP, 0), pygame.K_RIGHT: (-PAN_STEP, 0),
+                  pygame.K_UP: (0, PAN_STEP), pygame.K_DOWN: (0, -PAN_STEP)}
+        if event.key in arrows:
+            self.pan_view(*arrows[event.key])
+        elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            self.zoom_view(1)
+        elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            self.zoom_view(-1)
+        elif event.key in (pygame.K_0, pygame.K_HOME):
+            self.camera.fit(self.visibility.bounds())
+            self.view_changed()
+        else:
+            return False
+        return True
+
     def generate_layout(self):
         """Генерация раскладки из предопределенных полей"""
-        self.tiles = []
-        if self.layout_index < len(CUSTOM_LAYOUTS):
-            layout = CUSTOM_LAYOUTS[self.layout_index]
-
-            # Создаем список всех типов плиток (пары)
-            tile_types = []
-            for i in range(1, 19):  # 18 пар (36 плиток)
-                tile_types.extend([i, i])
-
-            # Перемешиваем типы плиток
-            random.shuffle(tile_types)
-
-            # Создаем плитки с перемешанными типами, но сохраняем позиции из layout
-            for i, tile_data in enumerate(layout):
-                if i < len(tile_types):
-                    _, x, y, z = tile_data
-                    tile_type = tile_types[i]
-                    tile = self.tile_factory.create_tile(tile_type, x, y, z)
-                    tile.update_position()
-                    self.tiles.append(tile)
-        else:
-            self.generate_winning_layout()
+        self.deal_positions(layout_positions(layout_index=self.layout_index))
 
     def generate_winning_layout(self):
         """Генерация выигрышной раскладки"""
-        self.tiles = []
-        pairs = [(i, i) for i in range(1, 19)]
-        random.shuffle(pairs)
+        self.deal_positions([(x, y, z) for _, x, y, z in CUSTOM_LAYOUTS[0]])
 
-        tile_types = []
-        for pair in pairs:
-            tile_types.extend(pair)
-
-        positions = CUSTOM_LAYOUTS[0][:len(tile_types)]
-
-        for i, tile_type in enumerate(tile_types):
-            _, x, y, z = positions[i]
-            tile = self.tile_factory.create_tile(tile_type, x, y, z)
-            tile.update_position()
-            self.tiles.append(tile)
+    def deal_positions(self, positions):
+        """Раздача плиток по всем позициям раскладки с гарантией хотя бы одного решения"""
+        positions = even_positions(positions)
+        tile_types = deal_solvable(get_blocking_graph(positions), seed=self.deal_seed)
+        self.store = self.tile_factory.create_tiles(
+            [(tile_type, x, y, z) for tile_type, (x, y, z) in zip(tile_types, positions)])
 
     def handle_input(self, event):
         """Обработка ввода"""
         if event.type == pygame.QUIT:
             return "quit"
 
+        if self.handle_camera_input(event):
+            return "game"
+
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_r and self.game_over:
                 self.reset_game()
             elif event.key in (pygame.K_m, pygame.K_ESCAPE):
                 return "menu"
             elif event.key == pygame.K_n:
+                self.end_session()  # Поражение учитывается по раскладке, на которой оно случилось
                 self.layout_index = (self.layout_index + 1) % len(CUSTOM_LAYOUTS)
                 self.reset_game()
+            elif event.key == pygame.K_z:
+                self.undo()
+            elif event.key == pygame.K_y:
+                self.redo()
+            elif event.key == pygame.K_f:
+                self.reshuffle()
             elif self.editor and event.key == pygame.K_s:
                 self.save_layout()
+            elif event.key == pygame.K_h and not self.game_over:
+                self.hint_requested = True
+                self.hint_worker.request()
+            elif event.key == pygame.K_a and not self.game_over:
+                self.auto_play = not self.auto_play
+                if self.auto_play:
+                    self.hint_worker.request()
+                else:
+                    self.set_status("")
 
         elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
             self.handle_click(event.pos)
@@ -103,23 +262,26 @@ class GameScreen(BaseScreen):
 
     def handle_click(self, pos):
         """Обработка клика"""
-        if self.game_over:
-            return
+        if self.game_over or not self.FIELD_RECT.collidepoint(pos):
+            return  # Плитки под панелями не выбираются
 
-        for tile in self.tiles:
-            tile.selected = False
+        if self.selected_tile:
+            self.selected_tile.selected = False
+            self.mark_dirty(self.tile_bounds(self.selected_tile))
 
+        # Под курсором обычно лишь несколько плиток - сортируются только они
         clicked_tile = None
-        for tile in sorted(self.tiles, key=lambda t: (-t.z, -(t.x + t.y))):
-            if not tile.removed and tile.rect.collidepoint(pos):
-                if not tile.is_covered(self.tiles) and not tile.is_blocked(self.tiles):
-                    clicked_tile = tile
-                    break
+        store = self.store
+        for index in sorted(store.tiles_at(self.camera.to_world(pos)), key=lambda i: (-store.z[i], -(store.x[i] + store.y[i]))):
+            if self.board.is_free(index):
+                clicked_tile = self.tiles[index]
+                break
 
         if clicked_tile:
             if self.selected_tile is None:
                 self.selected_tile = clicked_tile
                 clicked_tile.selected = True
+                self.mark_dirty(self.tile_bounds(clicked_tile))
             else:
                 if self.selected_tile == clicked_tile:
                     self.selected_tile.selected = False
@@ -129,91 +291,300 @@ class GameScreen(BaseScreen):
 
     def handle_tile_match(self, clicked_tile):
         """Обработка совпадения плиток"""
-        if self.selected_tile.tile_type == clicked_tile.tile_type:
-            self.selected_tile.removed = True
-            clicked_tile.removed = True
-
-            # Проверка на победу
-            if all(tile.removed for tile in self.tiles):
-                self.game_over = True
-                self.win = True
-                self.time_manager.update()
-                if self.best_time == 0 or self.time_manager.current_time < self.best_time:
-                    self.best_time = self.time_manager.current_time
-                    save_best_time(self.best_time)
+        selected_tile = self.selected_tile
+        selected_tile.selected = False
+        self.selected_tile = None
+
+        if selected_tile.tile_type == clicked_tile.tile_type:
+            self.remove_pair(selected_tile, clicked_tile)
         else:
             # Неправильное совпадение - снимаем выделение
             pass
 
-        self.selected_tile.selected = False
-        self.selected_tile = None
+    def remove_pair(self, first, second):
+        """Снятие пары плиток с поля"""
+        self.board.remove_pair(first.index, second.index)
+        self.history.push(first.index, second.index)
+        self.time_manager.update()
+        self.session.add_move(self.time_manager.current_time, first.index, second.index)
+        self.board_changed((first, second))
+        self.check_game_over()
+
+    def undo(self):
+        """Отмена последнего хода: на поле возвращается только снятая пара"""
+        if self.win:
+            return False
+        move = self.history.undo()
+        if move is None:
+            return False
+
+        self.board.restore_pair(*move)
+        self.time_manager.update()
+        self.session.add_undo(self.time_manager.current_time)
+        self.board_changed([self.tiles[index] for index in move])
+        self.auto_play = False
+        self.set_status("")
+
+        if self.game_over:
+            # Партия продолжается; поражение ещё не записано в статистику (это делает end_session)
+            self.game_over = False
+            self.session.reopen()
+            self.time_manager.resume()
+            self.mark_dirty()
+        self.check_game_over()
+        return True
+
+    def redo(self):
+        """Повтор отменённого хода"""
+        move = self.history.peek_redo()
+        if move is None or self.game_over:
+            return False
+        self.remove_pair(self.tiles[move[0]], self.tiles[move[1]])
+        return True
+
+    def reshuffle(self, seed=None):
+        """Перемешивание оставшихся плиток по их местам так, чтобы партию можно было закончить"""
+        if self.win:
+            return False
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        tile_types = reshuffle_types(self.board_graph, self.store.tile_type, self.store.removed,
+                                     self.board.free_tiles, seed)
+        if tile_types is None:
+            self.set_status("Перемешать нельзя")
+            return False
+
+        self.board.retype(tile_types)
+        self.history.drop_redo()  # Отменённые ходы снимали бы плитки уже других типов
+        self.time_manager.update()
+        self.session.add_reshuffle(self.time_manager.current_time, seed)
+        self.board_changed(())
+        self.hint_worker.set_board(self.board)  # Решатель подсказок знает прежние типы
+        self.auto_play = False
+        self.set_status("")
+        self.compose_board_layer(self.board_layer.get_rect())
+        self.mark_dirty()
+
+        if self.game_over:
+            self.game_over = False
+            self.session.reopen()
+            self.time_manager.resume()
+        return True
+
+    def board_changed(self, tiles):
+        """Перерисовка снятых или возвращённых плиток и сброс того, что зависело от поля"""
+        for tile in tiles:
+            bounds = self.tile_bounds(tile).clip(self.board_layer.get_rect())
+            self.compose_board_layer(bounds)
+            self.mark_dirty(bounds)
+
+        # Поле изменилось: прежняя подсказка и идущий поиск больше не нужны
+        self.hint_worker.invalidate()
+        self.clear_hint()
+        if self.selected_tile is not None:
+            self.selected_tile.selected = False
+            self.mark_dirty(self.tile_bounds(self.selected_tile))
+            self.selected_tile = None
+
+    def check_game_over(self):
+        """Проверка окончания партии после изменения поля"""
+        # Проверка на победу
+        if self.board.is_cleared():
+            self.game_over = True
+            self.win = True
+            self.mark_dirty()
+            self.time_manager.update()
+            if self.best_time == 0 or self.time_manager.current_time < self.best_time:
+                self.best_time = self.time_manager.current_time
 
         # Проверка на проигрыш (нет доступных ходов)
-        if not self.has_available_moves():
+        if not self.game_over and not self.has_available_moves():
             self.game_over = True
             self.win = False
+            self.mark_dirty()
+
+        if self.game_over:
+            self.auto_play = False
+            self.set_status("")
+            self.time_manager.pause()
+            self.session.finish(self.win, self.time_manager.current_time)
+            if self.win:
+                # Победа окончательна (её нельзя отменить), поражение - только при уходе из партии
+                self.record_result()
+            self.save_session()
+
+    def record_result(self):
+        """Учёт законченной партии в статистике игрока (один раз за партию)"""
+        if self.RECORD_STATS and not self.stats_recorded:
+            self.stats_recorded = True
+            self.stats.record_game(self.player_name, self.layout_key, self.win, self.time_manager.current_time)
+
+    def end_session(self):
+        """Партия покидается (рестарт, смена раскладки, выход в меню или из игры)
+
+        Проигранная партия попадает в статистику только здесь: до этого поражение
+        можно отменить ходом назад или перемешиванием."""
+        self.hint_worker.invalidate()  # Поиск по брошенному полю не должен отнимать время у следующего экрана
+        if self.session is None:
+            return
+        if self.game_over:
+            self.record_result()
+        self.save_session()
+
+    def save_session(self):
+        """Сохранение записи партии (если задан каталог и был хотя бы один ход)"""
+        if self.record_dir and self.session is not None and self.session.moves and self.session.saved_path is None:
+            try:
+                path = self.session.save(self.record_dir)
+                print(f"Запись партии: {path}")
+            except OSError as e:
+                print(f"Не удалось сохранить запись партии: {e}")
 
     def has_available_moves(self):
         """Проверка доступных ходов"""
-        available_tiles = [t for t in self.tiles
-                           if not t.removed
-                           and not t.is_covered(self.tiles)
-                           and not t.is_blocked(self.tiles)]
-
-        type_counts = {}
-        for tile in available_tiles:
-            type_counts[tile.tile_type] = type_counts.get(tile.tile_type, 0) + 1
-
-        return any(count >= 2 for count in type_counts.values())
+        return self.board.has_available_moves()
 
     def update(self):
         """Обновление состояния игры"""
         if not self.game_over and not self.win:
             self.time_manager.update()
 
-    def render(self):
-        """Отрисовка игры"""
-        self.screen.fill((50, 100, 150))
+            # Надпись с временем меняется раз в секунду
+            formatted_time = self.time_manager.get_formatted_time()
+            if formatted_time != self.shown_time:
+                self.shown_time = formatted_time
+                self.mark_dirty(self.TIMER_RECT)
 
-        # Панели сверху и снизу
-        pygame.draw.rect(self.screen, COLOR_BLACK, (0, 0, SCREEN_WIDTH, 50))
-        pygame.draw.rect(self.screen, COLOR_BLACK, (0, SCREEN_HEIGHT - 50, SCREEN_WIDTH, 50))
+            if self.hint_requested or self.auto_play:
+                self.update_hint()
 
+    def next_wakeup(self):
+        """В простое игра обновляется только при смене секунды на таймере"""
+        if self.dirty_rects or self.hint_requested or self.auto_play:
+            return 0
         if self.game_over:
+            return None
+        until_tick = self.time_manager.seconds_until_tick()
+        return None if until_tick is None else until_tick + 0.005
+
+    def pause(self):
+        """Потеря фокуса останавливает таймер партии"""
+        self.time_manager.pause()
+
+    def resume(self):
+        if not self.game_over:
+            self.time_manager.resume()
+        super().resume()
+
+    def update_hint(self):
+        """Получение результата фонового поиска подсказки"""
+        result = self.hint_worker.lookup()
+        if result is None:
+            if not self.hint_worker.is_busy():
+                self.hint_worker.request()
+            self.set_status("Думаю...")
+            return
+
+        status, move = result
+        if move is None:
+            self.hint_requested = False
+            self.auto_play = False
+            self.set_status("Решения нет" if status == UNSOLVABLE else "Решение не найдено")
+            return
+
+        if self.auto_play:
+            self.set_status("Автоигра")
+            now = time.time()
+            if now >= self.next_auto_move:
+                self.next_auto_move = now + self.AUTO_PLAY_DELAY
+                self.remove_pair(self.tiles[move[0]], self.tiles[move[1]])
+        elif self.hint_requested:
+            self.hint_requested = False
+            self.set_status("")
+            self.show_hint(move)
+
+    def show_hint(self, move):
+        """Подсветка пары из подсказки"""
+        self.clear_hint()
+        self.hint_tiles = tuple(self.tiles[index] for index in move)
+        for tile in self.hint_tiles:
+            self.mark_dirty(self.tile_bounds(tile))
+
+    def clear_hint(self):
+        """Снятие подсветки подсказки"""
+        for tile in self.hint_tiles:
+            self.mark_dirty(self.tile_bounds(tile))
+        self.hint_tiles = ()
+
+    def set_status(self, text):
+        """Сообщение подсказки в верхней панели"""
+        if text != self.status_text:
+            self.status_text = text
+            self.mark_dirty(self.STATUS_RECT)
+
+    def render(self):
+        """Отрисовка игры (только изменившихся областей)"""
+        if not self.dirty_rects:
+            return
+
+        if self.game_over:
+            self.render_background(self.screen)
             self.render_game_over()
-        else:
-            # Отрисовка плиток
-            for tile in sorted(self.tiles, key=lambda t: (t.z, t.y, t.x)):
-                if not tile.removed:
-                    tile.draw(self.screen, self.tile_images)
+            return
 
-            # Отрисовка интерфейса
+        atlas = self.tile_atlas.scaled(self.camera.zoom)
+        for rect in self.dirty_rects:
+            self.screen.set_clip(rect)
+
+            # Поле берётся из закэшированного слоя, поверх - выделение и интерфейс
+            self.screen.blit(self.board_layer, rect, rect)
+            for tile in self.hint_tiles:
+                if rect.colliderect(self.tile_bounds(tile)):
+                    tile.draw_hint(self.screen, atlas, self.camera)
+            if self.selected_tile and rect.colliderect(self.tile_bounds(self.selected_tile)):
+                self.selected_tile.draw_selection(self.screen, atlas, self.camera)
             self.render_ui()
+        self.screen.set_clip(None)
+
+    def render_background(self, surface):
+        """Отрисовка фона и панелей"""
+        surface.fill((50, 100, 150))
+
+        # Панели сверху и снизу
+        pygame.draw.rect(surface, COLOR_BLACK, (0, 0, SCREEN_WIDTH, 50))
+        pygame.draw.rect(surface, COLOR_BLACK, (0, SCREEN_HEIGHT - 50, SCREEN_WIDTH, 50))
 
     def render_ui(self):
         """Отрисовка интерфейса"""
         # Имя игрока
-        name_text = self.small_font.render(f"Игрок: {self.player_name}", True, COLOR_WHITE)
+        name_text = self.render_text(f"Игрок: {self.player_name}", self.small_font, COLOR_WHITE)
         self.screen.blit(name_text, (10, 10))
 
         # Время игры
-        time_text = self.small_font.render(f"Время: {self.time_manager.get_formatted_time()}", True, COLOR_WHITE)
+        time_text = self.render_text(f"Время: {self.time_manager.get_formatted_time()}", self.small_font, COLOR_WHITE)
         self.screen.blit(time_text, (10, SCREEN_HEIGHT - 40))
 
         # Лучшее время
         best_min = int(self.best_time // 60)
         best_sec = int(self.best_time % 60)
-        best_time_text = self.small_font.render(f"Лучшее: {best_min:02d}:{best_sec:02d}", True, COLOR_WHITE)
+        best_time_text = self.render_text(f"Лучшее: {best_min:02d}:{best_sec:02d}", self.small_font, COLOR_WHITE)
         self.screen.blit(best_time_text, (SCREEN_WIDTH - best_time_text.get_width() - 10, SCREEN_HEIGHT - 40))
 
+        # Подсказка и автоигра
+        if self.status_text:
+            status_text = self.render_text(self.status_text, self.small_font, COLOR_YELLOW)
+            self.screen.blit(status_text, status_text.get_rect(center=self.STATUS_RECT.center))
+
         # Номер раскладки
-        layout_text = self.small_font.render(f"Раскладка: {self.layout_index + 1}/{len(CUSTOM_LAYOUTS)}", True,
-                                             COLOR_WHITE)
+        layout_text = self.render_text(f"Раскладка: {self.layout_index + 1}/{len(CUSTOM_LAYOUTS)}",
+                                       self.small_font, COLOR_WHITE)
         self.screen.blit(layout_text, (SCREEN_WIDTH - layout_text.get_width() - 10, 10))
 
     def render_game_over(self):
         """Отрисовка экрана окончания игры"""
         # Полупрозрачный
+        if profiler.ENABLED:
+            profiler.count('surface')
         overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 180))
         self.screen.blit(overlay, (0, 0))
@@ -225,24 +596,27 @@ class GameScreen(BaseScreen):
 
             # Если установлен новый рекорд
             if self.time_manager.current_time == self.best_time:
-                self.draw_text_centered("Новый рекорд!", SCREEN_HEIGHT // 2, color=(255, 255, 0))
+                self.draw_text_centered("Новый рекорд!", SCREEN_HEIGHT // 2, color=COLOR_YELLOW)
         else:
             self.draw_text_centered("Игра окончена", SCREEN_HEIGHT // 2 - 50, color=COLOR_RED)
 
         # Инструкции
-        self.draw_text_centered("Нажмите R для рестарта", SCREEN_HEIGHT // 2 + 50, font=self.small_font)
-        self.draw_text_centered("ESC для выхода в меню", SCREEN_HEIGHT // 2 + 90, font=self.small_font)
-        self.draw_text_centered("N для смены раскладки", SCREEN_HEIGHT // 2 + 130, font=self.small_font)
+        hints = self.GAME_OVER_HINTS
+        if not self.win:
+            hints += (self.RESHUFFLE_HINT,)
+            if self.history.can_undo():
+                hints += (self.UNDO_HINT,)
+        for i, text in enumerate(hints):
+            self.draw_text_centered(text, SCREEN_HEIGHT // 2 + 50 + i * 40, font=self.small_font)
 
     def load_layout(self):
         """Загрузка раскладки из файла"""
         try:
-            with open(self.filename, 'r') as f:
-                for line in f:
-                    parts = line.strip().split(',')
-                    if len(parts) == 4:
-                        tile_type, x, y, z = map(int, parts)
-                        self.tiles.append(self.tile_factory.create_tile(tile_type, x, y, z))
+            self.store = self.tile_factory.create_tiles(read_layout_file(self.filename))
+
+            # Вне редактора типы из файла не важны - позиции раздаются заново
+            if not self.editor:
+                self.deal_positions(self.store.positions())
         except Exception as e:
             print(f"Ошибка загрузки раскладки: {e}")
             self.generate_layout()
@@ -251,6 +625,12 @@ class GameScreen(BaseScreen):
         """Сохранение раскладки"""
         if not self.editor or not self.filename:
             return
+        if is_layout_pack(self.filename):
+            print("Пакет раскладок только для чтения: сохраните уровень в CSV и соберите пакет заново")
+            return
+        if is_generated_layout(self.filename):
+            print("Сгенерированная раскладка не сохраняется: выгрузите её в CSV через layout_generator.py")
+            return
 
         try:
             with open(self.filename, 'w') as f:
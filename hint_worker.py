@@ -0,0 +1,86 @@
+import threading
+from solver import Solver, SOLVABLE, UNSOLVABLE, UNKNOWN
+
+
+class HintWorker:
+    """Поиск хода, сохраняющего разрешимость, в фоновом потоке
+
+    Результаты кэшируются по состоянию поля (битовой маске снятых плиток), причём
+    для всех позиций найденного решения, так что повторная подсказка и автоигра
+    по решению ничего не стоят. Изменение поля отменяет текущий поиск.
+    """
+
+    def __init__(self, time_limit=10.0):
+        self.time_limit = time_limit
+        self.search_lock = threading.Lock()  # Одновременно идёт только один поиск
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.board = None
+        self.solver = None
+        self.cache = {}  # mask -> (status, move)
+        self.pending = None  # Маска позиции, для которой идёт поиск
+
+    def set_board(self, board):
+        """Новая раздача: старые результаты больше не нужны"""
+        with self.lock:
+            self.generation += 1
+            self.board = board
+            self.solver = Solver.from_board(board, time_limit=self.time_limit)
+            self.cache = {}
+            self.pending = None
+
+    def invalidate(self):
+        """Поле изменилось: текущий поиск больше не нужен"""
+        with self.lock:
+            self.generation += 1
+            self.pending = None
+
+    def lookup(self):
+        """Результат для текущего состояния поля: (status, move) или None, если его ещё нет"""
+        with self.lock:
+            return self.cache.get(self.board.mask)
+
+    def is_busy(self):
+        """Идёт ли поиск для текущего состояния поля"""
+        with self.lock:
+            return self.pending is not None and self.pending == self.board.mask
+
+    def request(self):
+        """Запуск поиска для текущего состояния поля (если результата ещё нет)"""
+        with self.lock:
+            mask = self.board.mask
+            if mask in self.cache or self.pending == mask:
+                return
+            self.pending = mask
+            generation = self.generation
+            solver = self.solver
+            removed = bytes(self.board.removed)
+
+        thread = threading.Thread(target=self._run, args=(solver, generation, mask, removed), daemon=True)
+        thread.start()
+
+    def _run(self, solver, generation, mask, removed):
+        with self.search_lock:
+            if generation != self.generation:
+                return
+
+            solver.cancel = lambda: generation != self.generation
+            result = solver.solve(removed)
+
+            with self.lock:
+                if solver is not self.solver:
+                    return  # За время поиска началась новая раздача
+
+                if result.status == SOLVABLE:
+                    # Подсказки для всех позиций по пути решения
+                    for move in result.moves:
+                        self.cache[mask] = (SOLVABLE, move)
+                        mask |= (1 << move[0]) | (1 << move[1])
+                elif result.status == UNSOLVABLE:
+                    self.cache[mask] = (UNSOLVABLE, None)
+                elif generation == self.generation:
+                    # Бюджет исчерпан - повторный поиск не поможет
+                    self.cache[mask] = (UNKNOWN, None)
+
+                if generation == self.generation:
+                    self.pending = None
@@ -0,0 +1,241 @@
+"""Процедурные раскладки: пирамиды, черепахи, крепости и случайные стопки
+
+Раскладка строится на сетке плиток (столбец, строка, слой; половинные столбцы
+и строки - сдвиг на полплитки) и переводится в координаты CUSTOM_LAYOUTS.
+Размер задаётся числом плиток: форма растёт до нужного размера, а лишние
+плитки снимаются с самых верхних слоёв, так что каждая плитка выше первого
+слоя по-прежнему на что-то опирается, а число плиток чётное.
+
+В игре и симуляции сгенерированная раскладка задаётся вместо файла уровня
+ссылкой '@форма:число плиток[:зерно]', например --level @turtle:1000.
+
+Запуск из корня репозитория:
+    python layout_generator.py pyramid turtle --count 144 1000 10000 --output-dir levels
+    python layout_generator.py random --count 20000 --seed 7 --pack stress.mjl
+"""
+import argparse
+import os
+import random
+from constants import *
+
+ORIGIN_X = 100  # Левый верхний угол раскладки, как у встроенной
+ORIGIN_Y = 100
+MAX_SIZE = 1 << 12  # Предел параметра размера формы
+
+
+def pyramid(size, rng=None):
+    """Ступенчатая пирамида: основание 2*size x size, каждый слой меньше на плитку с каждой стороны"""
+    width, height = 2 * size, size
+    layer = 0
+    while layer < height - layer:
+        for row in range(layer, height - layer):
+            for col in range(layer, width - layer):
+                yield col, row, layer + 1
+        layer += 1
+
+
+def turtle(size, rng=None):
+    """Черепаха: панцирь из четырёх слоёв со скруглёнными углами, голова, хвост и верхняя плитка"""
+    width, height = 2 * size + 2, max(2, size)
+    middle = (height - 1) / 2
+    for col in range(width):
+        for row in range(height):
+            corner = row in (0, height - 1) and col in (0, width - 1)
+            if not corner:
+                yield col, row, 1
+
+    top = 1
+    for layer in range(1, 4):
+        cols = range(layer + 1, width - layer - 1)
+        rows = range(layer, height - layer)
+        if len(cols) < 2 or len(rows) < 1:
+            break
+        for row in rows:
+            for col in cols:
+                yield col, row, layer + 1
+        top = layer + 1
+
+    # Верхняя плитка посередине панциря опирается на четыре плитки под ней
+    if top > 1 and height - 2 * (top - 1) >= 2:
+        yield (width - 1) / 2, middle, top + 1
+
+    yield -1, middle, 1  # Голова
+    yield width, middle, 1  # Хвост
+    yield width + 1, middle, 1
+
+
+def fortress(size, rng=None):
+    """Крепость: двор в один слой, стены в три, башни по углам и донжон-пирамида в центре"""
+    side = max(4, size)
+    for row in range(side):
+        for col in range(side):
+            yield col, row, 1
+
+            wall = row in (0, side - 1) or col in (0, side - 1)
+            tower = row in (0, side - 1) and col in (0, side - 1)
+            if wall:
+                yield col, row, 2
+                yield col, row, 3
+            if tower:
+                yield col, row, 4
+                yield col, row, 5
+
+    keep = side - 4
+    layer = 0
+    while keep - 2 * layer > 0:
+        for row in range(2 + layer, side - 2 - layer):
+            for col in range(2 + layer, side - 2 - layer):
+                yield col, row, layer + 2
+        layer += 1
+
+
+def random_stacks(size, rng=None):
+    """Случайные стопки высотой до четырёх плиток на сетке 2*size x size (с пустыми местами)"""
+    rng = rng or random.Random(0)
+    for row in range(size):
+        for col in range(2 * size):
+            for z in range(1, rng.randint(0, 4) + 1):
+                yield col, row, z
+
+
+SHAPES = {
+    'pyramid': pyramid,
+    'turtle': turtle,
+    'fortress': fortress,
+    'random': random_stacks,
+}
+
+
+def shape_cells(shape, size, seed=0):
+    """Клетки формы заданного размера: список (столбец, строка, слой)"""
+    return list(SHAPES[shape](size, random.Random(seed)))
+
+
+def fit_size(shape, count, seed=0):
+    """Наименьший размер формы, в котором не меньше count плиток"""
+    low, high = 1, 2
+    while len(shape_cells(shape, high, seed)) < count:
+        if high >= MAX_SIZE:
+            raise ValueError(f"Слишком много плиток для формы {shape}: {count}")
+        low, high = high, high * 2
+    while low < high:
+        middle = (low + high) // 2
+        if len(shape_cells(shape, middle, seed)) < count:
+            low = middle + 1
+        else:
+            high = middle
+    return high
+
+
+def generate_layout(shape, count=144, seed=0):
+    """Раскладка формы shape из count плиток (нечётное число уменьшается на одну): список (type, x, y, z)"""
+    if shape not in SHAPES:
+        raise ValueError(f"Неизвестная форма раскладки: {shape}")
+    count -= count % 2
+    if count < 2:
+        raise ValueError(f"Слишком мало плиток: {count}")
+
+    cells = shape_cells(shape, fit_size(shape, count, seed), seed)
+    # Лишние плитки снимаются сверху: на них ничего не лежит
+    order = sorted(range(len(cells)), key=lambda i: (cells[i][2], i))
+    keep = sorted(order[:count])
+
+    layout = []
+    for number, index in enumerate(keep):
+        col, row, z = cells[index]
+        tile_type = number // 2 % TILE_TYPES + 1  # Для редактора; в игре типы раздаются заново
+        layout.append((tile_type, ORIGIN_X + round(col * TILE_WIDTH), ORIGIN_Y + round(row * TILE_HEIGHT), z))
+    return layout
+
+
+def validate_layout(layout):
+    """Проверка раскладки: чётность, наложения на одном слое и опора плиток выше первого слоя
+
+    Возвращает список найденных ошибок (пустой - раскладка корректна)."""
+    problems = []
+    if len(layout) % 2:
+        problems.append(f"нечётное число плиток: {len(layout)}")
+
+    # Сетка клеток размером с плитку: соседи по перекрытию - в соседних клетках
+    grid = {}
+    for index, (_, x, y, z) in enumerate(layout):
+        grid.setdefault((x // TILE_WIDTH, y // TILE_HEIGHT, z), []).append(index)
+
+    def overlapping(x, y, z):
+        cell_x, cell_y = x // TILE_WIDTH, y // TILE_HEIGHT
+        for gx in (cell_x - 1, cell_x, cell_x + 1):
+            for gy in (cell_y - 1, cell_y, cell_y + 1):
+                for other in grid.get((gx, gy, z), ()):
+                    _, ox, oy, _ = layout[other]
+                    if abs(ox - x) < TILE_WIDTH and abs(oy - y) < TILE_HEIGHT:
+                        yield other
+
+    for index, (_, x, y, z) in enumerate(layout):
+        if z < 1:
+            problems.append(f"плитка {index}: слой {z} меньше первого")
+            continue
+        same_layer = [other for other in overlapping(x, y, z) if other != index]
+        if same_layer and min(same_layer) > index:
+            problems.append(f"плитка {index}: наложение на плитку {min(same_layer)} в слое {z}")
+        if z > 1 and next(overlapping(x, y, z - 1), None) is None:
+            problems.append(f"плитка {index}: в слое {z} нет опоры")
+    return problems
+
+
+def is_generated_layout(filename):
+    return filename.startswith(GENERATED_LAYOUT_PREFIX)
+
+
+def parse_generated_name(filename):
+    """Разбор ссылки '@форма:число плиток[:зерно]' -> (форма, число плиток, зерно)"""
+    parts = filename[len(GENERATED_LAYOUT_PREFIX):].split(':')
+    if not 1 <= len(parts) <= 3 or parts[0] not in SHAPES:
+        raise ValueError(f"Неверная ссылка на сгенерированную раскладку: {filename}")
+    count = int(parts[1]) if len(parts) > 1 else 144
+    seed = int(parts[2]) if len(parts) > 2 else 0
+    return parts[0], count, seed
+
+
+def read_generated_layout(filename):
+    """Раскладка по ссылке '@форма:число плиток[:зерно]'"""
+    return generate_layout(*parse_generated_name(filename))
+
+
+def generated_layouts(shapes, counts, seed=0):
+    """Раскладки для всех сочетаний форм и размеров: список (имя, раскладка)"""
+    return [(f"{shape}-{count}", generate_layout(shape, count, seed)) for shape in shapes for count in counts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генерация раскладок маджонга')
+    parser.add_argument('shapes', nargs='+', choices=sorted(SHAPES), help='Формы раскладок')
+    parser.add_argument('--count', nargs='+', type=int, default=[144], help='Число плиток (можно несколько)')
+    parser.add_argument('--seed', type=int, default=0, help='Зерно для случайных форм')
+    parser.add_argument('--output-dir', default='.', help='Каталог для файлов уровней CSV')
+    parser.add_argument('--pack', help='Записать все раскладки в один пакет (.mjl) вместо CSV')
+    args = parser.parse_args()
+
+    layouts = generated_layouts(args.shapes, args.count, args.seed)
+    for name, layout in layouts:
+        problems = validate_layout(layout)
+        if problems:
+            raise SystemExit(f"{name}: {problems[0]}")
+
+    if args.pack:
+        from layout_pack import write_layout_pack
+        write_layout_pack(args.pack, layouts)
+        print(f"Записано раскладок: {len(layouts)} в {args.pack}")
+        return
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for name, layout in layouts:
+        filename = os.path.join(args.output_dir, f"{name}.csv")
+        with open(filename, 'w') as f:
+            for tile_type, x, y, z in layout:
+                f.write(f"{tile_type},{x},{y},{z}\n")
+        layers = max(z for _, _, _, z in layout)
+        print(f"{filename:<40} {len(layout):>7} плиток, слоёв: {layers}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Бинарный пакет раскладок: много именованных раскладок в одном файле
+
+Формат (все числа little-endian):
+    заголовок   magic b'MJLP', версия (uint16), число раскладок (uint32)
+    индекс      для каждой раскладки: смещение данных (uint64), число плиток (uint32),
+                длина имени (uint16) и имя в UTF-8
+    данные      плитки раскладок подряд, по четыре int32 на плитку: type, x, y, z
+
+Файл открывается через mmap: при открытии читается только индекс, плитки
+раскладки разбираются при обращении к ней.
+
+Запуск из корня репозитория:
+    python layout_pack.py pack levels.mjl level1.csv level2.csv --builtin
+    python layout_pack.py unpack levels.mjl levels/
+    python layout_pack.py list levels.mjl
+"""
+import argparse
+import mmap
+import os
+import struct
+import tempfile
+from constants import *
+
+MAGIC = b'MJLP'
+VERSION = 1
+HEADER = struct.Struct('<4sHI')
+ENTRY = struct.Struct('<QIH')
+TILE = struct.Struct('<4i')
+
+
+class LayoutPackError(Exception):
+    """Повреждённый или несовместимый пакет раскладок"""
+
+
+class LayoutPack:
+    """Пакет раскладок, открытый только для чтения через mmap"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise LayoutPackError(f"Пустой файл пакета: {filename}")
+        self.index = {}  # имя -> (смещение, число плиток)
+        try:
+            self._read_index()
+        except (LayoutPackError, struct.error, UnicodeDecodeError) as e:
+            self.close()
+            raise LayoutPackError(f"Повреждённый пакет {filename}: {e}")
+
+    def _read_index(self):
+        magic, version, count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            raise LayoutPackError("неверная сигнатура")
+        if version != VERSION:
+            raise LayoutPackError(f"неподдерживаемая версия {version}")
+
+        position = HEADER.size
+        for _ in range(count):
+            offset, tiles, name_length = ENTRY.unpack_from(self.data, position)
+            position += ENTRY.size
+            name = self.data[position:position + name_length].decode('utf-8')
+            position += name_length
+            if offset + tiles * TILE.size > len(self.data):
+                raise LayoutPackError(f"раскладка {name} выходит за конец файла")
+            self.index[name] = (offset, tiles)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def names(self):
+        """Имена раскладок в порядке хранения"""
+        return list(self.index)
+
+    def layout(self, name=None):
+        """Раскладка по имени (None - первая) списком (type, x, y, z)"""
+        if name is None:
+            if not self.index:
+                raise LayoutPackError(f"Пакет {self.filename} пуст")
+            name = next(iter(self.index))
+        offset, tiles = self.index[name]
+        return list(TILE.iter_unpack(self.data[offset:offset + tiles * TILE.size]))
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        self.file.close()
+
+
+def write_layout_pack(filename, layouts):
+    """Запись пакета из пар (имя, раскладка); файл заменяется атомарно"""
+    layouts = [(name.encode('utf-8'), list(layout)) for name, layout in layouts]
+    if len({name for name, _ in layouts}) != len(layouts):
+        raise ValueError("Имена раскладок в пакете должны быть уникальны")
+
+    offset = HEADER.size + sum(ENTRY.size + len(name) for name, _ in layouts)
+    parts = [HEADER.pack(MAGIC, VERSION, len(layouts))]
+    for name, layout in layouts:
+        parts.append(ENTRY.pack(offset, len(layout), len(name)) + name)
+        offset += len(layout) * TILE.size
+    for _, layout in layouts:
+        parts.extend(TILE.pack(*tile) for tile in layout)
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_name = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b''.join(parts))
+        os.chmod(temp_name, 0o644)  # Пакет - обычный ресурс игры, а не приватный временный файл
+        os.replace(temp_name, filename)
+    except BaseException:
+        os.unlink(temp_name)
+        raise
+
+
+def split_pack_name(filename):
+    """Разбор ссылки на раскладку в пакете: 'levels.mjl#имя' -> ('levels.mjl', 'имя')
+
+    Для файлов, не являющихся пакетом, возвращает (filename, None)."""
+    path, _, name = filename.partition('#')
+    if path.endswith(LAYOUT_PACK_EXT):
+        return path, name or None
+    return filename, None
+
+
+def is_layout_pack(filename):
+    return split_pack_name(filename)[0].endswith(LAYOUT_PACK_EXT)
+
+
+def read_pack_layout(filename):
+    """Раскладка по ссылке 'levels.mjl#имя' (без имени - первая в пакете)"""
+    path, name = split_pack_name(filename)
+    with LayoutPack(path) as pack:
+        return pack.layout(name)
+
+
+def csv_to_pack(pack_filename, csv_filenames, builtin=False):
+    """Сборка пакета из файлов уровней CSV (имя раскладки - имя файла без расширения)"""
+    from utils import read_layout_file
+
+    layouts = []
+    if builtin:
+        layouts += [(f"builtin{i + 1}", layout) for i, layout in enumerate(CUSTOM_LAYOUTS)]
+    for filename in csv_filenames:
+        name = os.path.splitext(os.path.basename(filename))[0]
+        layouts.append((name, read_layout_file(filename)))
+    write_layout_pack(pack_filename, layouts)
+    return len(layouts)
+
+
+def pack_to_csv(pack_filename, directory):
+    """Выгрузка всех раскладок пакета в файлы уровней CSV (формат save_layout)"""
+    os.makedirs(directory, exist_ok=True)
+    with LayoutPack(pack_filename) as pack:
+        for name in pack.names():
+            with open(os.path.join(directory, f"{name}.csv"), 'w') as f:
+                for tile_type, x, y, z in pack.layout(name):
+                    f.write(f"{tile_type},{x},{y},{z}\n")
+        return len(pack)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Пакеты раскладок маджонга')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    pack_parser = commands.add_parser('pack', help='Собрать пакет из файлов CSV')
+    pack_parser.add_argument('pack', help='Файл пакета (.mjl)')
+    pack_parser.add_argument('levels', nargs='*', help='Файлы уровней CSV')
+    pack_parser.add_argument('--builtin', action='store_true', help='Добавить встроенные раскладки')
+
+    unpack_parser = commands.add_parser('unpack', help='Выгрузить пакет в файлы CSV')
+    unpack_parser.add_argument('pack', help='Файл пакета (.mjl)')
+    unpack_parser.add_argument('directory', help='Каталог для файлов CSV')
+
+    list_parser = commands.add_parser('list', help='Список раскладок пакета')
+    list_parser.add_argument('pack', help='Файл пакета (.mjl)')
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        count = csv_to_pack(args.pack, args.levels, builtin=args.builtin)
+        print(f"Записано раскладок: {count}")
+    elif args.command == 'unpack':
+        count = pack_to_csv(args.pack, args.directory)
+        print(f"Выгружено раскладок: {count}")
+    else:
+        with LayoutPack(args.pack) as pack:
+            for name in pack.names():
+                print(f"{name:<32} {pack.index[name][1]:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,144 @@
+import time
+
+STARTED = time.perf_counter()  # Отсчёт времени до первого кадра - с загрузки модуля
+
 import argparse
 import pygame
 import sys
 from menu_screen import MenuScreen
 from game_screen import GameScreen
 from settings_screen import SettingsScreen
-from utils import ResourceManager
+from simulator import POLICIES, run_simulation
+from profiler import FrameProfiler
+from replay import ReplayScreen, run_replays
+from session import GameSession
+from stats_store import close_stats_store
+from tile_factory import TileFactory
+from utils import ResourceManager, read_layout_file
+from layout_pack import LayoutPack, is_layout_pack, split_pack_name
 from constants import *
 
 
+# События окна, при которых игра встаёт на паузу и снова продолжается
+PAUSE_EVENTS = (pygame.WINDOWFOCUSLOST, pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN)
+RESUME_EVENTS = (pygame.WINDOWFOCUSGAINED, pygame.WINDOWRESTORED, pygame.WINDOWSHOWN)
+
+
+def wait_next_frame(clock, wakeup, busy=False):
+    """Ожидание следующего кадра: полный темп при анимации, иначе сон до события
+
+    wakeup - через сколько секунд экрану нужно обновиться (0 - сразу, None - только по событию).
+    pygame.event.wait(timeout) внутри опрашивает очередь каждую миллисекунду, поэтому
+    в простое очередь проверяется реже, а между проверками процесс спит."""
+    if busy or wakeup == 0:
+        clock.tick(60)
+        return
+
+    deadline = time.perf_counter() + (IDLE_MAX_WAIT if wakeup is None else min(wakeup, IDLE_MAX_WAIT))
+    while not pygame.event.peek():
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+        time.sleep(min(IDLE_POLL_INTERVAL, remaining))
+    clock.tick()  # Сон не должен учитываться как длительность кадра
+
+
 def main():
     """Главная функция"""
     parser = argparse.ArgumentParser(description='Маджонг')
-    parser.add_argument('--player_name', type=str, default='Игрок', help='Имя игрока')
+    parser.add_argument('--player_name', type=str, default=DEFAULT_PLAYER, help='Имя игрока')
     parser.add_argument('--editor', action='store_true', help='Режим редактора')
-    parser.add_argument('--level', type=str, help='Файл уровня для редактора')
+    parser.add_argument('--level', type=str,
+                        help='Файл уровня (CSV, пакет раскладок levels.mjl#имя или @форма:число плиток)')
+    parser.add_argument('--seed', type=int, help='Зерно раздачи для воспроизведения партии')
+    parser.add_argument('--full-redraw', action='store_true', help='Перерисовывать весь экран каждый кадр')
+    parser.add_argument('--no-idle', action='store_true',
+                        help='Всегда 60 кадров/с, без ожидания событий в простое')
+    parser.add_argument('--max-frames', type=int, help='Выйти после заданного числа кадров (для замеров)')
+    parser.add_argument('--profile', action='store_true', help='Профилирование фаз кадра (F3 - вкл/выкл)')
+    parser.add_argument('--profile-output', metavar='FILE',
+                        help='Выгрузка замеров кадров в CSV или Chrome trace (.json)')
+    parser.add_argument('--asset-cache-mb', type=int, default=ASSET_CACHE_BYTES // (1024 * 1024),
+                        help='Бюджет памяти кэша шрифтов и изображений, МБ')
+    parser.add_argument('--record', metavar='DIR', help='Сохранять записи партий в каталог')
+    parser.add_argument('--replay', nargs='+', metavar='FILE', help='Проиграть записи партий')
+    parser.add_argument('--headless', action='store_true',
+                        help='Проверить записи без окна с максимальной скоростью (с --replay)')
+    parser.add_argument('--replay-speed', type=float, default=1.0, help='Ускорение проигрывания на экране')
+    parser.add_argument('--simulate', nargs='*', metavar='LEVEL',
+                        help='Прогнать партии без окна по всем раскладкам и файлам уровней')
+    parser.add_argument('--games', type=int, default=1000, help='Число партий на раскладку при симуляции')
+    parser.add_argument('--policy', nargs='+', choices=sorted(POLICIES), default=sorted(POLICIES),
+                        help='Стратегии игры при симуляции')
+    parser.add_argument('--workers', type=int, help='Число процессов для симуляции')
     args = parser.parse_args()
 
+    if args.simulate is not None:
+        layouts = [(f"Раскладка {i + 1}", layout) for i, layout in enumerate(CUSTOM_LAYOUTS)]
+        for filename in args.simulate:
+            path, name = split_pack_name(filename)
+            if is_layout_pack(path) and name is None:
+                # Пакет без имени раскладки - прогоняются все его раскладки
+                with LayoutPack(path) as pack:
+                    layouts += [(f"{path}#{name}", pack.layout(name)) for name in pack.names()]
+            else:
+                layouts.append((filename, read_layout_file(filename)))
+        run_simulation(layouts, args.policy, args.games, args.workers, seed=args.seed or 0)
+        return
+
+    if args.replay and args.headless:
+        sys.exit(1 if run_replays(args.replay) else 0)
+
     pygame.init()
     pygame.mixer.init()  # Инициализация аудио миксера
 
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Маджонг")
 
-    resource_manager = ResourceManager()
-    resource_manager.load_music(MUSIC_FILE)  # Загрузка музыки
-    resource_manager.play_music()
+    # Медленные ресурсы грузятся в фоне, меню с полосой загрузки показывается сразу.
+    # Шрифты открываются здесь же, в главном потоке: это быстро, а меню без них не нарисовать
+    resource_manager = ResourceManager(max_bytes=args.asset_cache_mb * 1024 * 1024)
+    resource_manager.preload_image(MENU_BG)  # Меню покажет фон, когда он загрузится
+    resource_manager.preload_music(MUSIC_FILE)  # Музыка включится, когда загрузится
+    TileFactory.preload_tile_images(resource_manager)  # Плитки готовятся до начала партии
 
     current_screen = "menu"
     menu = MenuScreen(screen, resource_manager, player_name=args.player_name)
     game = None
+    if args.replay:
+        current_screen = "game"
+        game = ReplayScreen(screen, resource_manager, GameSession.load(args.replay[0]), speed=args.replay_speed)
+    active = game or menu
     settings = None
 
     clock = pygame.time.Clock()
     running = True
+    frames = 0
+    report_startup = args.profile or args.max_frames is not None
+    frame_profiler = FrameProfiler(enabled=args.profile, output=args.profile_output)
+    paused = False  # Окно свёрнуто или потеряло фокус
 
     while running:
+        frame_profiler.begin_frame(current_screen)
+        erase_overlay = False
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
 
+            if event.type in PAUSE_EVENTS and not paused:
+                paused = True
+                active.pause()
+                continue
+            if event.type in RESUME_EVENTS and paused:
+                paused = False
+                active.resume()
+                continue
+
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                frame_profiler.toggle()
+                erase_overlay = not frame_profiler.enabled
+                continue
+
             if current_screen == "menu":
                 result = menu.handle_input(event)
                 if result == "game":
@@ -49,7 +149,9 @@ def main():
                         player_name=menu.player_name,
                         editor=args.editor,
                         filename=args.level,
-                        layout_index=0
+                        layout_index=0,
+                        seed=args.seed,
+                        record_dir=args.record
                     )
                 elif result == "settings":
                     current_screen = "settings"
@@ -62,27 +164,71 @@ def main():
                 if result == "back":
                     current_screen = "menu"
                     menu.player_name = settings.player_name
+                    menu.mark_dirty()
 
             elif current_screen == "game":
                 result = game.handle_input(event)
                 if result == "menu":
+                    game.end_session()
                     current_screen = "menu"
                     menu.player_name = game.player_name
+                    menu.mark_dirty()
                 elif result == "quit":
                     running = False
 
+        resource_manager.poll()
+
         # Отрисовка
         if current_screen == "menu":
-            menu.render()
+            active = menu
         elif current_screen == "settings":
-            settings.render()
-        elif current_screen == "game":
-            game.update()
-            game.render()
-
-        pygame.display.flip()
-        clock.tick(60)
-
+            active = settings
+        else:
+            active = game
+
+        frame_profiler.mark('events')
+
+        # Свёрнутое или неактивное окно не обновляется и не перерисовывается
+        if not paused:
+            if args.full_redraw or erase_overlay:
+                active.mark_dirty()
+            active.update()
+            frame_profiler.mark('update')
+            active.render()
+            frame_profiler.mark('render')
+
+            if frame_profiler.enabled:
+                active.mark_dirty(frame_profiler.draw_overlay(screen))
+
+            # На экран выводятся только изменившиеся области
+            dirty_rects = active.pop_dirty_rects()
+            if dirty_rects:
+                pygame.display.update(dirty_rects)
+            frame_profiler.mark('flip')
+
+        frames += 1
+        if frames == 1 and report_startup:
+            print(f"Время до первого кадра: {(time.perf_counter() - STARTED) * 1000:.1f} мс")
+        if args.max_frames is not None and frames >= args.max_frames:
+            running = False
+        elif not running or args.no_idle or args.full_redraw:
+            clock.tick(60)
+        else:
+            wait_next_frame(clock, None if paused else active.next_wakeup(),
+                            busy=frame_profiler.enabled or not resource_manager.is_ready())
+        frame_profiler.mark('idle')
+        frame_profiler.end_frame()
+
+    if game is not None:
+        game.end_session()
+    frame_profiler.close()
+    resource_manager.shutdown()
+    close_stats_store()  # Дожидается записи последних результатов
+    if args.profile:
+        for title, stats in (("Кэш ресурсов", resource_manager.cache_stats()),
+                             ("Кэш надписей", resource_manager.texts.stats())):
+            print(f"{title}:", ", ".join(f"{name}={value:.2f}" if isinstance(value, float) else f"{name}={value}"
+                                         for name, value in stats.items()))
     pygame.quit()
     sys.exit()
 
@@ -4,15 +4,25 @@ from constants import *
 
 class MenuScreen(BaseScreen):
     """Экран меню"""
-    def __init__(self, screen, resource_manager, player_name="Игрок"):
+
+    # Полоса фоновой загрузки ресурсов (видна, пока загрузка не закончена)
+    PROGRESS_RECT = pygame.Rect(SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT - 90, 300, 12)
+
+    def __init__(self, screen, resource_manager, player_name=DEFAULT_PLAYER):
         super().__init__(screen, resource_manager)
         self.player_name = player_name
         self.options = ["Новая игра", "Настройки", "Выход"]
         self.selected = 0
         self.background = resource_manager.load_image(MENU_BG)
+        self.progress = resource_manager.preload_progress()
+        self.prerender_labels([("Маджонг",)] + [(option, None, color) for option in self.options
+                                                for color in (COLOR_WHITE, COLOR_YELLOW)])
 
     def handle_input(self, event):
         """Обработка ввода"""
+        if event.type == pygame.KEYDOWN:
+            self.mark_dirty()
+
         if event.type == pygame.QUIT:
             return "quit"
 
@@ -33,8 +43,28 @@ class MenuScreen(BaseScreen):
 
         return "menu"
 
+    def update(self):
+        """Слежение за фоновой загрузкой ресурсов"""
+        progress = self.resource_manager.preload_progress()
+        if progress != self.progress:
+            self.progress = progress
+            self.mark_dirty(self.PROGRESS_RECT)
+        if self.background is None and self.resource_manager.is_ready(f"image:{MENU_BG}"):
+            self.background = self.resource_manager.load_image(MENU_BG)
+            if self.background is not None:
+                self.mark_dirty()
+
+    def next_wakeup(self):
+        """Пока идёт фоновая загрузка, полоса прогресса обновляется по таймеру"""
+        if self.progress < 1.0 and not self.dirty_rects:
+            return PRELOAD_POLL_INTERVAL
+        return super().next_wakeup()
+
     def render(self):
         """Отрисовка меню"""
+        if not self.dirty_rects:
+            return
+
         if self.background:
             self.screen.blit(self.background, (0, 0))
         else:
@@ -48,3 +78,6 @@ class MenuScreen(BaseScreen):
 
         player_text = f"Игрок: {self.player_name}"
         self.draw_text_centered(player_text, SCREEN_HEIGHT - 40, self.small_font)
+
+        if self.progress < 1.0:
+            self.draw_progress(self.PROGRESS_RECT, self.progress)
@@ -0,0 +1,61 @@
+from array import array
+
+
+class MoveHistory:
+    """История снятых пар для отмены и повтора ходов
+
+    Хранит только номера плиток (8 байт на ход) и позицию курсора: ходы до
+    курсора сделаны, после него - отменены и доступны для повтора. Обратная
+    операция к снятию пары - возврат той же пары (Board.restore_pair).
+    """
+
+    def __init__(self):
+        self.pairs = array('I')  # Номера плиток парами: first, second, first, second...
+        self.position = 0  # Число сделанных ходов
+
+    def __len__(self):
+        return len(self.pairs) // 2
+
+    def push(self, first, second):
+        """Учёт сделанного хода
+
+        Совпадающий со следующим отменённым ход считается повтором и сохраняет
+        остальные отменённые ходы, любой другой их отбрасывает.
+        """
+        offset = self.position * 2
+        if self.position < len(self) and self.pairs[offset] == first and self.pairs[offset + 1] == second:
+            self.position += 1
+            return
+        del self.pairs[offset:]
+        self.pairs.append(first)
+        self.pairs.append(second)
+        self.position += 1
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self)
+
+    def undo(self):
+        """Пара последнего сделанного хода (курсор сдвигается назад) или None"""
+        if not self.can_undo():
+            return None
+        self.position -= 1
+        offset = self.position * 2
+        return self.pairs[offset], self.pairs[offset + 1]
+
+    def peek_redo(self):
+        """Пара следующего отменённого хода или None (курсор сдвигает push при повторе)"""
+        if not self.can_redo():
+            return None
+        offset = self.position * 2
+        return self.pairs[offset], self.pairs[offset + 1]
+
+    def drop_redo(self):
+        """Забыть отменённые ходы"""
+        del self.pairs[self.position * 2:]
+
+    def clear(self):
+        del self.pairs[:]
+        self.position = 0
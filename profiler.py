@@ -0,0 +1,189 @@
+import csv
+import json
+import threading
+import time
+from collections import deque
+import pygame
+import text_cache
+from constants import *
+
+# Глобальный флаг для счётчиков в горячих местах: проверка одного атрибута модуля
+# почти ничего не стоит, когда профилирование выключено
+ENABLED = False
+counters = {}
+
+
+def count(name):
+    """Учёт горячего вызова в текущем кадре (вызывать под проверкой profiler.ENABLED)
+
+    Считаются только вызовы из главного потока: кадр принадлежит ему, а решатель
+    подсказок в фоновом потоке менял бы словарь, пока кадр его читает."""
+    if threading.current_thread() is threading.main_thread():
+        counters[name] = counters.get(name, 0) + 1
+
+
+class FrameProfiler:
+    """Замер фаз каждого кадра с оверлеем (p50, p95, max) и потоковой выгрузкой"""
+
+    PHASES = ('events', 'update', 'render', 'flip', 'idle')
+    HISTORY = 300  # Сколько последних кадров учитывается в статистике
+    OVERLAY_REFRESH = 0.25  # Как часто обновлять текст оверлея, с
+    OVERLAY_POS = (10, 60)
+
+    def __init__(self, enabled=False, output=None):
+        self.history = {}  # (screen, phase или счётчик) -> deque длительностей/значений
+        self.frame = 0
+        self.screen_name = None
+        self.frame_start = 0
+        self.last_mark = 0
+        self.phase_times = []
+        self.overlay = None
+        self.overlay_rect = pygame.Rect(self.OVERLAY_POS, (0, 0))
+        self.overlay_updated = 0
+        self.font = None
+
+        self.output = None
+        self.writer = None
+        self.trace_started = False
+        self.trace_origin = time.perf_counter()
+        if output:
+            self.open_output(output)
+
+        self.enabled = False
+        self.set_enabled(enabled)
+
+    def set_enabled(self, enabled):
+        global ENABLED
+        self.enabled = enabled
+        ENABLED = enabled
+        counters.clear()
+
+        # Включение посреди кадра: отсчёт фаз начинается с текущего момента
+        self.frame_start = self.last_mark = time.perf_counter()
+        self.phase_times = []
+
+    def toggle(self):
+        """Включение/выключение профилирования (горячая клавиша)"""
+        self.set_enabled(not self.enabled)
+
+    def open_output(self, filename):
+        """Поток в CSV или в Chrome trace (по расширению .json)"""
+        self.output = open(filename, 'w', newline='', encoding='utf-8')
+        if filename.endswith('.json'):
+            self.output.write('[\n')
+        else:
+            self.writer = csv.writer(self.output)
+            self.writer.writerow(['frame', 'screen', 'phase', 'ms'])
+
+    def begin_frame(self, screen_name):
+        self.screen_name = screen_name
+        if not self.enabled:
+            return
+        self.frame_start = self.last_mark = time.perf_counter()
+        self.phase_times = []
+
+    def mark(self, phase):
+        """Завершение фазы кадра"""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phase_times.append((phase, self.last_mark, now))
+        self.last_mark = now
+
+    def end_frame(self):
+        if not self.enabled or not self.phase_times:
+            return
+        self.frame += 1
+        snapshot = dict(counters)
+        counters.clear()
+
+        for phase, start, end in self.phase_times:
+            self._record(phase, (end - start) * 1000)
+        self._record('frame', (self.last_mark - self.frame_start) * 1000)
+        for name, value in snapshot.items():
+            self._record(name, value)
+
+        if self.output is not None:
+            self._write_frame(snapshot)
+
+    def _record(self, name, value):
+        key = (self.screen_name, name)
+        samples = self.history.get(key)
+        if samples is None:
+            samples = self.history[key] = deque(maxlen=self.HISTORY)
+        samples.append(value)
+
+    def _write_frame(self, snapshot):
+        if self.writer is not None:
+            for phase, start, end in self.phase_times:
+                self.writer.writerow([self.frame, self.screen_name, phase, f"{(end - start) * 1000:.4f}"])
+            for name, value in snapshot.items():
+                self.writer.writerow([self.frame, self.screen_name, name, value])
+            return
+
+        events = [
+            {'name': phase, 'cat': self.screen_name, 'ph': 'X', 'pid': 1, 'tid': 1,
+             'ts': round((start - self.trace_origin) * 1e6, 1), 'dur': round((end - start) * 1e6, 1)}
+            for phase, start, end in self.phase_times
+        ]
+        if snapshot:
+            events.append({'name': 'counters', 'ph': 'C', 'pid': 1, 'tid': 1,
+                           'ts': round((self.frame_start - self.trace_origin) * 1e6, 1), 'args': snapshot})
+        for event in events:
+            self.output.write((',\n' if self.trace_started else '') + json.dumps(event))
+            self.trace_started = True
+
+    def stats(self, screen_name):
+        """p50, p95 и max по фазам и счётчикам экрана"""
+        result = {}
+        for (name_screen, name), samples in self.history.items():
+            if name_screen != screen_name or not samples:
+                continue
+            ordered = sorted(samples)
+            result[name] = (ordered[len(ordered) // 2],
+                            ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                            ordered[-1])
+        return result
+
+    def draw_overlay(self, surface):
+        """Отрисовка оверлея; возвращает занятую им область экрана"""
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_updated >= self.OVERLAY_REFRESH:
+            self.overlay_updated = now
+            self.overlay = self._render_overlay()
+        self.overlay_rect = surface.blit(self.overlay, self.OVERLAY_POS)
+        return self.overlay_rect
+
+    def _render_overlay(self):
+
+        stats = self.stats(self.screen_name)
+        lines = [f"{self.screen_name}: кадр {self.frame}", f"{'фаза':<10}{'p50':>8}{'p95':>8}{'max':>8}"]
+        for name in self.PHASES + ('frame',):
+            if name in stats:
+                p50, p95, peak = stats[name]
+                lines.append(f"{name:<10}{p50:>8.2f}{p95:>8.2f}{peak:>8.2f}")
+        for name in sorted(set(stats) - set(self.PHASES) - {'frame'}):
+            p50, p95, peak = stats[name]
+            lines.append(f"{name:<10}{p50:>8.0f}{p95:>8.0f}{peak:>8.0f}")
+
+        with text_cache.FONT_LOCK:
+            if self.font is None:
+                self.font = pygame.font.SysFont('monospace', 14)
+            rendered = [self.font.render(line, True, COLOR_WHITE) for line in lines]
+        # Оверлей только растёт, чтобы под ним не оставалось следов прежнего текста
+        width = max(max(text.get_width() for text in rendered) + 10, self.overlay_rect.width)
+        height = max(sum(text.get_height() for text in rendered) + 10, self.overlay_rect.height)
+        overlay = pygame.Surface((width, height))
+        overlay.fill((20, 20, 20))
+        y = 5
+        for text in rendered:
+            overlay.blit(text, (5, y))
+            y += text.get_height()
+        return overlay
+
+    def close(self):
+        if self.output is not None:
+            if self.writer is None:
+                self.output.write('\n]\n')
+            self.output.close()
+            self.output = None
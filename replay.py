@@ -0,0 +1,181 @@
+import time
+import pygame
+from blocking_graph import get_blocking_graph
+from board import Board
+from deal import deal_solvable, even_positions, reshuffle_types
+from game_screen import GameScreen
+from session import GameSession, UNDO, RESHUFFLE
+from tile_factory import TileFactory
+from utils import layout_positions
+
+
+class ReplayResult:
+    """Итог проигрывания записи без окна"""
+
+    def __init__(self, session, moves, cleared, stuck, error, elapsed):
+        self.session = session
+        self.moves = moves  # Сколько ходов применено
+        self.cleared = cleared
+        self.stuck = stuck  # Ходов на поле больше нет
+        self.error = error  # Описание первого недопустимого хода или None
+        self.elapsed = elapsed
+
+    @property
+    def matches(self):
+        """Совпадает ли итог с записанным"""
+        if self.error is not None:
+            return False
+        if self.session.result is None:
+            return True  # Партия не была закончена - сверять не с чем
+        return self.session.result['win'] == self.cleared and (self.cleared or self.stuck)
+
+    @property
+    def moves_per_second(self):
+        return self.moves / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def move_error(board, first, second):
+    """Почему записанный ход нельзя сделать на поле (None - ход допустим)"""
+    count = len(board.tile_types)
+    if not (0 <= first < count and 0 <= second < count) or first == second:
+        return f"неверные номера плиток {first}, {second}"
+    if not (board.is_free(first) and board.is_free(second)):
+        return f"плитки {first}, {second} недоступны"
+    if board.tile_types[first] != board.tile_types[second]:
+        return f"плитки {first}, {second} разного типа"
+    return None
+
+
+def replay_headless(session):
+    """Проигрывание записи на модели поля с максимальной скоростью"""
+    start = time.perf_counter()
+    positions = even_positions(layout_positions(session.filename, session.layout_index))
+    graph = get_blocking_graph(positions)
+    tile_types = deal_solvable(graph, seed=session.seed)
+    store = TileFactory.create_tiles([(tile_type, x, y, z) for tile_type, (x, y, z) in zip(tile_types, positions)])
+    board = Board(store, graph)
+
+    applied = 0
+    error = None
+    done = []  # Снятые пары для отмены ходов
+    for step, (_, first, second) in enumerate(session.moves):
+        if first == UNDO:
+            if not done:
+                error = f"ход {step + 1}: отменять нечего"
+                break
+            board.restore_pair(*done.pop())
+            applied += 1
+            continue
+        if first == RESHUFFLE:
+            shuffled = reshuffle_types(graph, store.tile_type, store.removed, board.free_tiles, second)
+            if shuffled is None:
+                error = f"ход {step + 1}: перемешать нельзя"
+                break
+            board.retype(shuffled)
+            applied += 1
+            continue
+        problem = move_error(board, first, second)
+        if problem is not None:
+            error = f"ход {step + 1}: {problem}"
+            break
+        board.remove_pair(first, second)
+        done.append((first, second))
+        applied += 1
+
+    return ReplayResult(session, applied, board.is_cleared(), not board.has_available_moves(), error,
+                        time.perf_counter() - start)
+
+
+def run_replays(filenames):
+    """Проверка записей без окна с таблицей итогов; возвращает число несовпадений"""
+    failures = 0
+    print(f"{'запись':<40} {'ходов':>6} {'записано':>10} {'итог':>8} {'ходов/с':>10}  проверка")
+    for filename in filenames:
+        try:
+            result = replay_headless(GameSession.load(filename))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"{filename:<40} ошибка чтения: {e}")
+            failures += 1
+            continue
+
+        outcome = "победа" if result.cleared else ("тупик" if result.stuck else "-")
+        status = "ok" if result.matches else f"НЕ СОВПАДАЕТ {result.error or ''}".rstrip()
+        print(f"{filename:<40} {result.moves:>6} {result.session.duration:>9.1f}с {outcome:>8} "
+              f"{result.moves_per_second:>10.0f}  {status}")
+        if not result.matches:
+            failures += 1
+    return failures
+
+
+class ReplayScreen(GameScreen):
+    """Проигрывание записи на экране в реальном времени (speed - ускорение)"""
+
+    RECORD_STATS = False
+
+    def __init__(self, screen, resource_manager, session, speed=1.0):
+        self.replay_session = session
+        self.speed = speed
+        self.next_move = 0
+        super().__init__(screen, resource_manager, player_name=session.player or "Запись", filename=session.filename,
+                         layout_index=session.layout_index, seed=session.seed)
+        self.replay_start = time.perf_counter()
+        self.replay_paused_at = 0  # Когда окно потеряло фокус (0 - проигрывание идёт)
+
+    def handle_input(self, event):
+        """Во время проигрывания работают только камера, выход в меню и закрытие окна"""
+        if event.type == pygame.QUIT:
+            return "quit"
+        if self.handle_camera_input(event):
+            return "game"
+        if event.type == pygame.KEYDOWN and event.key in (pygame.K_m, pygame.K_ESCAPE):
+            return "menu"
+        return "game"
+
+    def can_continue(self):
+        """После поражения запись может продолжиться только отменой хода или перемешиванием"""
+        return not self.game_over or (not self.win and self.replay_session.moves[self.next_move][1] in (UNDO, RESHUFFLE))
+
+    def replay_time(self):
+        """Время записи, до которого дошло проигрывание, мс (без пауз при потере фокуса)"""
+        now = self.replay_paused_at or time.perf_counter()
+        return (now - self.replay_start) * 1000 * self.speed
+
+    def pause(self):
+        """Проигрывание останавливается вместе с таймером партии"""
+        super().pause()
+        if not self.replay_paused_at:
+            self.replay_paused_at = time.perf_counter()
+
+    def resume(self):
+        if self.replay_paused_at:
+            self.replay_start += time.perf_counter() - self.replay_paused_at
+            self.replay_paused_at = 0
+        super().resume()
+
+    def update(self):
+        moves = self.replay_session.moves
+        now = self.replay_time()
+        while self.next_move < len(moves) and moves[self.next_move][0] <= now and self.can_continue():
+            _, first, second = moves[self.next_move]
+            self.next_move += 1
+            if first in (UNDO, RESHUFFLE):
+                if not (self.undo() if first == UNDO else self.reshuffle(second)):
+                    self.next_move = len(moves)
+                    self.set_status("Запись расходится с раздачей")
+                    break
+                continue
+            if move_error(self.board, first, second) is not None:
+                # Запись не соответствует раздаче - дальше проигрывать нечего
+                self.next_move = len(moves)
+                self.set_status("Запись расходится с раздачей")
+                break
+            self.remove_pair(self.tiles[first], self.tiles[second])
+        super().update()
+
+    def next_wakeup(self):
+        wakeup = super().next_wakeup()
+        moves = self.replay_session.moves
+        if self.next_move < len(moves) and self.can_continue():
+            until_move = max(0.0, (moves[self.next_move][0] - self.replay_time()) / 1000 / self.speed)
+            wakeup = until_move if wakeup is None else min(wakeup, until_move)
+        return wakeup
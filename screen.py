@@ -10,6 +10,8 @@ class BaseScreen:
         self.resource_manager = resource_manager
         self.base_font = resource_manager.load_font('base', 40)
         self.small_font = resource_manager.load_font('small', 30)
+        self.dirty_rects = []
+        self.mark_dirty()
 
     def handle_input(self, event):
         """Обработка ввода"""
@@ -23,6 +25,48 @@ class BaseScreen:
         """Отрисовка экрана"""
         raise NotImplementedError
 
+    def next_wakeup(self):
+        """Через сколько секунд экрану нужно обновиться без событий (0 - сразу, None - не нужно)"""
+        return 0 if self.dirty_rects else None
+
+    def pause(self):
+        """Окно свёрнуто или потеряло фокус"""
+        pass
+
+    def resume(self):
+        """Окно снова активно: экран перерисовывается целиком"""
+        self.mark_dirty()
+
+    def mark_dirty(self, rect=None):
+        """Пометка области экрана для перерисовки (None - весь экран)"""
+        if rect is None:
+            self.dirty_rects = [self.screen.get_rect()]
+        else:
+            self.dirty_rects.append(pygame.Rect(rect))
+
+    def pop_dirty_rects(self):
+        """Получение и сброс областей, изменившихся с прошлого кадра"""
+        rects = self.dirty_rects
+        self.dirty_rects = []
+        return rects
+
+    def render_text(self, text, font=None, color=COLOR_WHITE):
+        """Рендеринг надписи в поверхность (через общий кэш надписей)"""
+        font = font or self.base_font
+        return self.resource_manager.texts.render(font, text, color)
+
+    def prerender_labels(self, labels):
+        """Заблаговременная отрисовка неизменных надписей: кортежи (text[, font[, color]])"""
+        for label in labels:
+            self.render_text(*label)
+
+    def draw_progress(self, rect, fraction):
+        """Полоса прогресса загрузки"""
+        pygame.draw.rect(self.screen, COLOR_BLACK, rect)
+        filled = pygame.Rect(rect).inflate(-4, -4)
+        filled.width = int(filled.width * min(max(fraction, 0.0), 1.0))
+        pygame.draw.rect(self.screen, COLOR_YELLOW, filled)
+
     def draw_text_centered(self, text, y, font=None, color=COLOR_WHITE):
         """Для отрисовки текста по центру"""
         font = font or self.base_font
@@ -37,7 +81,7 @@ class BaseScreen:
                 text = ""
 
         try:
-            text_surface = font.render(text, True, color)
+            text_surface = self.render_text(text, font, color)
             text_rect = text_surface.get_rect(center=(SCREEN_WIDTH // 2, y))
             self.screen.blit(text_surface, text_rect)
         except Exception as e:
@@ -0,0 +1,87 @@
+import json
+import os
+import time
+
+SESSION_VERSION = 1
+UNDO = -1  # Номер плитки в записи отмены хода: (время, UNDO, UNDO)
+RESHUFFLE = -2  # Номер плитки в записи перемешивания: (время, RESHUFFLE, зерно)
+
+
+class GameSession:
+    """Запись партии: зерно раздачи, раскладка и ходы с отметками времени
+
+    Ход - тройка (время от начала партии в мс, номер первой плитки, номер второй).
+    Отмена последнего хода записывается тройкой (время, UNDO, UNDO), повтор -
+    обычным ходом. Перемешивание оставшихся плиток записывается тройкой
+    (время, RESHUFFLE, зерно перемешивания).
+    Зерна и раскладки достаточно, чтобы повторить раздачу, а ходов - чтобы
+    повторить всю партию (replay.py).
+    """
+
+    def __init__(self, seed, layout_index=0, filename=None, player=None, moves=None, result=None, started=None):
+        self.seed = seed
+        self.layout_index = layout_index
+        self.filename = filename
+        self.player = player
+        self.moves = [tuple(move) for move in moves] if moves else []
+        self.result = result  # {'win': bool, 'time_ms': int} после окончания партии
+        self.started = started if started is not None else time.time()
+        self.saved_path = None
+
+    def add_move(self, seconds, first, second):
+        self.moves.append((int(seconds * 1000), first, second))
+
+    def add_undo(self, seconds):
+        self.moves.append((int(seconds * 1000), UNDO, UNDO))
+
+    def add_reshuffle(self, seconds, seed):
+        self.moves.append((int(seconds * 1000), RESHUFFLE, seed))
+
+    def finish(self, win, seconds):
+        self.result = {'win': bool(win), 'time_ms': int(seconds * 1000)}
+
+    def reopen(self):
+        """Продолжение законченной партии после отмены хода (запись будет сохранена заново)"""
+        self.result = None
+        self.saved_path = None
+
+    @property
+    def duration(self):
+        """Длительность записанной партии, с"""
+        if self.result is not None:
+            return self.result['time_ms'] / 1000
+        return self.moves[-1][0] / 1000 if self.moves else 0.0
+
+    def to_dict(self):
+        return {
+            'version': SESSION_VERSION,
+            'seed': self.seed,
+            'layout_index': self.layout_index,
+            'filename': self.filename,
+            'player': self.player,
+            'started': self.started,
+            'result': self.result,
+            'moves': [list(move) for move in self.moves],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != SESSION_VERSION:
+            raise ValueError(f"Неподдерживаемая версия записи партии: {data.get('version')}")
+        return cls(data['seed'], data.get('layout_index', 0), data.get('filename'), data.get('player'),
+                   data.get('moves'), data.get('result'), data.get('started'))
+
+    def save(self, directory):
+        """Сохранение записи в каталог; возвращает путь к файлу"""
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))
+        path = os.path.join(directory, f"{stamp}-{self.seed}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+        self.saved_path = path
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
@@ -1,13 +1,13 @@
 import pygame
 from screen import BaseScreen
 from constants import *
-from utils import load_best_time
+from stats_store import get_stats_store
 
 
 class SettingsScreen(BaseScreen):
     """Экран настроек"""
 
-    def __init__(self, screen, resource_manager, player_name):
+    def __init__(self, screen, resource_manager, player_name, stats=None):
         super().__init__(screen, resource_manager)
         self.player_name = player_name
         self.options = [
@@ -18,12 +18,16 @@ class SettingsScreen(BaseScreen):
         self.selected = 0
         self.editing_name = False
         self.name_input = player_name
-        self.best_time = load_best_time()
+        self.stats = stats or get_stats_store()
         self.music_on = True  # Добавлено
+        self.prerender_labels([("Настройки",), ("Введите новое имя и нажмите Enter", self.small_font)]
+                              + [(option, None, color) for option in self.options + ["Музыка: Выкл"]
+                                 for color in (COLOR_WHITE, COLOR_YELLOW)])
 
     def handle_input(self, event):
         """Обработка ввода"""
         if event.type == pygame.KEYDOWN:
+            self.mark_dirty()
             if self.editing_name:
                 if event.key == pygame.K_RETURN:
                     self.editing_name = False
@@ -58,6 +62,9 @@ class SettingsScreen(BaseScreen):
 
     def render(self):
         """Отрисовка настроек"""
+        if not self.dirty_rects:
+            return
+
         self.screen.fill((50, 100, 150))
         self.draw_text_centered("Настройки", 50)
 
@@ -74,8 +81,10 @@ class SettingsScreen(BaseScreen):
         if self.editing_name:
             self.draw_text_centered("Введите новое имя и нажмите Enter", 400, self.small_font)
 
-        # Лучшее время
-        best_min = int(self.best_time // 60)
-        best_sec = int(self.best_time % 60)
+        # Лучшее время и статистика игрока по всем раскладкам
+        totals = self.stats.totals(self.player_name)
+        best_min = int(totals.best_time // 60)
+        best_sec = int(totals.best_time % 60)
         best_time_text = f"Лучшее время: {best_min:02d}:{best_sec:02d}"
         self.draw_text_centered(best_time_text, 500, self.small_font)
+        self.draw_text_centered(f"Партий: {totals.games}, побед: {totals.win_rate:.0%}", 540, self.small_font)
@@ -0,0 +1,147 @@
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from blocking_graph import get_blocking_graph
+from board import Board
+from deal import deal_solvable, even_positions
+from solver import Solver, SOLVABLE
+from tile_factory import TileFactory
+
+
+def free_pairs_by_type(board):
+    """Доступные плитки, сгруппированные по типам, у которых есть пара"""
+    groups = {}
+    for index in board.free_tiles:
+        tile_type = board.tile_types[index]
+        if board.free_counts[tile_type] >= 2:
+            groups.setdefault(tile_type, []).append(index)
+    return groups
+
+
+class RandomPolicy:
+    """Случайная доступная пара"""
+
+    name = "random"
+
+    def start(self, board, rng):
+        pass
+
+    def choose(self, board, rng):
+        groups = free_pairs_by_type(board)
+        if not groups:
+            return None
+        indices = groups[rng.choice(sorted(groups))]
+        return tuple(rng.sample(sorted(indices), 2))
+
+
+class GreedyPolicy:
+    """Пара, от которой зависит больше всего живых плиток"""
+
+    name = "greedy"
+
+    def start(self, board, rng):
+        pass
+
+    def choose(self, board, rng):
+        groups = free_pairs_by_type(board)
+        if not groups:
+            return None
+
+        def opened(index):
+            return sum(1 for other in board.graph.dependents[index] if not board.removed[other])
+
+        best = None
+        best_score = -1
+        for indices in groups.values():
+            ranked = sorted(indices, key=lambda index: (opened(index), rng.random()), reverse=True)
+            score = opened(ranked[0]) + opened(ranked[1])
+            if score > best_score:
+                best, best_score = (ranked[0], ranked[1]), score
+        return best
+
+
+class SolverPolicy(GreedyPolicy):
+    """Ходы из решения, найденного решателем (жадно, если бюджет исчерпан)"""
+
+    name = "solver"
+
+    def __init__(self, node_limit=200000):
+        self.node_limit = node_limit
+        self.plan = []
+
+    def start(self, board, rng):
+        result = Solver.from_board(board, node_limit=self.node_limit).solve(board.removed)
+        self.plan = list(reversed(result.moves)) if result.status == SOLVABLE else []
+
+    def choose(self, board, rng):
+        if self.plan:
+            return self.plan.pop()
+        return super().choose(board, rng)
+
+
+POLICIES = {policy.name: policy for policy in (RandomPolicy, GreedyPolicy, SolverPolicy)}
+
+
+def play_game(positions, policy, seed):
+    """Одна партия без окна и отрисовки: (победа, число ходов)"""
+    rng = random.Random(seed)
+    graph = get_blocking_graph(positions)
+    tile_types = deal_solvable(graph, seed=seed)
+    store = TileFactory.create_tiles([(tile_type, x, y, z) for tile_type, (x, y, z) in zip(tile_types, positions)])
+    board = Board(store, graph)
+
+    policy.start(board, rng)
+    moves = 0
+    while board.has_available_moves():
+        first, second = policy.choose(board, rng)
+        board.remove_pair(first, second)
+        moves += 1
+    return board.is_cleared(), moves
+
+
+def play_batch(positions, policy_name, seeds):
+    """Серия партий в одном процессе: (побед, сумма ходов)"""
+    policy = POLICIES[policy_name]()
+    wins = 0
+    total_moves = 0
+    for seed in seeds:
+        won, moves = play_game(positions, policy, seed)
+        wins += won
+        total_moves += moves
+    return wins, total_moves
+
+
+def simulate_layout(layout, policy_name="random", games=1000, workers=None, seed=0, batch_size=50):
+    """Статистика партий по раскладке (список (type, x, y, z)) на пуле процессов"""
+    positions = tuple(even_positions((x, y, z) for _, x, y, z in layout))
+    seeds = list(range(seed, seed + games))
+    batches = [seeds[i:i + batch_size] for i in range(0, games, batch_size)]
+
+    start = time.perf_counter()
+    wins = 0
+    total_moves = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(play_batch, positions, policy_name, batch) for batch in batches]
+        for future in futures:
+            batch_wins, batch_moves = future.result()
+            wins += batch_wins
+            total_moves += batch_moves
+    elapsed = time.perf_counter() - start
+
+    return {
+        'tiles': len(positions),
+        'games': games,
+        'win_rate': wins / games if games else 0.0,
+        'average_moves': total_moves / games if games else 0.0,
+        'games_per_second': games / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def run_simulation(layouts, policy_names, games=1000, workers=None, seed=0):
+    """Прогон всех раскладок и стратегий с выводом таблицы результатов"""
+    print(f"{'раскладка':<24} {'плиток':>7} {'стратегия':>10} {'побед':>8} {'ходов':>8} {'партий/с':>10}")
+    for name, layout in layouts:
+        for policy_name in policy_names:
+            stats = simulate_layout(layout, policy_name, games, workers, seed)
+            print(f"{name:<24} {stats['tiles']:>7} {policy_name:>10} {stats['win_rate']:>8.1%} "
+                  f"{stats['average_moves']:>8.1f} {stats['games_per_second']:>10.1f}")
@@ -0,0 +1,221 @@
+import time
+from collections import OrderedDict
+
+SOLVABLE = "solvable"
+UNSOLVABLE = "unsolvable"
+UNKNOWN = "unknown"
+
+
+class TranspositionTable:
+    """Ограниченная таблица тупиковых позиций (ключ - битовая маска снятых плиток)"""
+
+    def __init__(self, max_entries=1 << 18):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def __contains__(self, mask):
+        self.lookups += 1
+        if mask in self.entries:
+            self.entries.move_to_end(mask)
+            self.hits += 1
+            return True
+        return False
+
+    def add(self, mask):
+        """Запоминание тупика с вытеснением давно не использованных записей"""
+        self.entries[mask] = None
+        self.entries.move_to_end(mask)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+
+class SolveResult:
+    """Результат поиска решения"""
+
+    def __init__(self, status, moves, nodes, elapsed, table_lookups, table_hits):
+        self.status = status
+        self.moves = moves  # Последовательность пар (index, index) или None
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.table_lookups = table_lookups
+        self.table_hits = table_hits
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def hit_rate(self):
+        return self.table_hits / self.table_lookups if self.table_lookups else 0.0
+
+    def __repr__(self):
+        return (f"SolveResult({self.status}, moves={len(self.moves) if self.moves is not None else None}, "
+                f"nodes={self.nodes}, {self.nodes_per_second:.0f} nodes/s, hit rate {self.hit_rate:.1%})")
+
+
+class Solver:
+    """Полный перебор с запоминанием тупиков на той же модели поля, что и GameScreen"""
+
+    CHECK_INTERVAL = 256  # Как часто (в узлах) проверять бюджет
+
+    def __init__(self, graph, tile_types, table_size=1 << 18, node_limit=None, time_limit=None, cancel=None):
+        self.graph = graph
+        self.tile_types = list(tile_types)
+        self.table = TranspositionTable(table_size)
+        self.node_limit = node_limit
+        self.time_limit = time_limit
+        self.cancel = cancel  # Вызываемый объект: True - прервать поиск
+        self.bits = [1 << index for index in range(len(graph))]
+
+    @classmethod
+    def from_board(cls, board, **options):
+        """Решатель для состояния Board"""
+        return cls(board.graph, board.tile_types, **options)
+
+    def solve(self, removed=None):
+        """Поиск последовательности ходов, снимающей все плитки из заданного состояния"""
+        start = time.perf_counter()
+        lookups, hits = self.table.lookups, self.table.hits
+        self._setup(removed)
+
+        status, moves = self._search(start)
+
+        return SolveResult(status, moves, self.nodes, time.perf_counter() - start,
+                           self.table.lookups - lookups, self.table.hits - hits)
+
+    def _setup(self, removed):
+        count = len(self.graph)
+        self.removed = bytearray(removed) if removed is not None else bytearray(count)
+        self.mask = 0
+        self.remaining = 0
+        self.remaining_by_type = {}
+        self.free_by_type = {}
+        self.nodes = 0
+
+        for index in range(count):
+            tile_type = self.tile_types[index]
+            self.free_by_type.setdefault(tile_type, set())
+            if self.removed[index]:
+                self.mask |= self.bits[index]
+            else:
+                self.remaining += 1
+                self.remaining_by_type[tile_type] = self.remaining_by_type.get(tile_type, 0) + 1
+                if self.graph.is_free(index, self.removed):
+                    self.free_by_type[tile_type].add(index)
+
+    def _search(self, start):
+        """Перебор в глубину без рекурсии (глубина - до половины числа плиток)"""
+        if not self.remaining:
+            return SOLVABLE, []
+        if self.mask in self.table:
+            return UNSOLVABLE, None
+
+        path = []
+        stack = [[self._moves(), 0]]
+        while stack:
+            frame = stack[-1]
+            moves, position = frame
+            if position == len(moves):
+                # Все ходы из позиции ведут в тупик
+                self.table.add(self.mask)
+                stack.pop()
+                if path:
+                    self._undo(path.pop())
+                continue
+
+            frame[1] = position + 1
+            move = moves[position]
+            self._apply(move)
+            path.append(move)
+            self.nodes += 1
+
+            if not self.remaining:
+                return SOLVABLE, path
+
+            if self.nodes % self.CHECK_INTERVAL == 0 and self._out_of_budget(start):
+                return UNKNOWN, None
+            # Отмена проверяется на каждом узле: на большом поле интервал проверки бюджета - секунды
+            if self.cancel is not None and self.cancel():
+                return UNKNOWN, None
+
+            if self.mask in self.table:
+                self._undo(path.pop())
+                continue
+
+            stack.append([self._moves(), 0])
+
+        return UNSOLVABLE, None
+
+    def _out_of_budget(self, start):
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            return True
+        return self.time_limit is not None and time.perf_counter() - start >= self.time_limit
+
+    def _moves(self):
+        """Доступные ходы, лучшие - первыми"""
+        moves = []
+        for tile_type, free in self.free_by_type.items():
+            if len(free) < 2:
+                continue
+            items = sorted(free)
+
+            # Все оставшиеся плитки типа доступны: снять пару безопасно, другие ветки не нужны
+            if len(items) == self.remaining_by_type[tile_type]:
+                return [(items[0], items[1])]
+
+            for i, first in enumerate(items):
+                for second in items[i + 1:]:
+                    moves.append((first, second))
+
+        moves.sort(key=self._score, reverse=True)
+        return moves
+
+    def _score(self, move):
+        """Сколько живых плиток зависит от снимаемой пары"""
+        removed = self.removed
+        dependents = self.graph.dependents
+        return sum(1 for index in move for other in dependents[index] if not removed[other])
+
+    def _apply(self, move):
+        for index in move:
+            self.removed[index] = 1
+            self.mask |= self.bits[index]
+            tile_type = self.tile_types[index]
+            self.free_by_type[tile_type].discard(index)
+            self.remaining_by_type[tile_type] -= 1
+        self.remaining -= 2
+        self._refresh_dependents(move)
+
+    def _undo(self, move):
+        for index in move:
+            self.removed[index] = 0
+            self.mask &= ~self.bits[index]
+            tile_type = self.tile_types[index]
+            self.free_by_type[tile_type].add(index)
+            self.remaining_by_type[tile_type] += 1
+        self.remaining += 2
+        self._refresh_dependents(move)
+
+    def _refresh_dependents(self, move):
+        removed = self.removed
+        for index in move:
+            for other in self.graph.dependents[index]:
+                if removed[other]:
+                    continue
+                free = self.free_by_type[self.tile_types[other]]
+                if self.graph.is_free(other, removed):
+                    free.add(other)
+                else:
+                    free.discard(other)
+
+
+def solve_board(board, **options):
+    """Проверка разрешимости текущего состояния Board"""
+    return Solver.from_board(board, **options).solve(board.removed)
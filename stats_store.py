@@ -0,0 +1,195 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from constants import *
+
+
+class PlayerStats:
+    """Сводка игрока по одной раскладке"""
+
+    def __init__(self, games=0, wins=0, best_time=0):
+        self.games = games
+        self.wins = wins
+        self.best_time = best_time  # 0 - побед ещё не было
+
+    @property
+    def win_rate(self):
+        return self.wins / self.games if self.games else 0.0
+
+    def add(self, won, seconds):
+        self.games += 1
+        if won:
+            self.wins += 1
+            if self.best_time == 0 or seconds < self.best_time:
+                self.best_time = seconds
+
+    def __repr__(self):
+        return f"PlayerStats(games={self.games}, wins={self.wins}, best_time={self.best_time:.1f})"
+
+
+class StatsStore:
+    """Статистика партий в SQLite по игроку и раскладке
+
+    Сводки читаются из базы один раз при открытии и дальше живут в памяти, а
+    результаты партий записываются пачками в фоновом потоке, так что сохранение
+    не задерживает кадр.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY,
+            player TEXT NOT NULL,
+            layout TEXT NOT NULL,
+            won INTEGER NOT NULL,
+            seconds REAL NOT NULL,
+            played_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS games_player_layout ON games (player, layout);
+    """
+
+    def __init__(self, path=STATS_FILE):
+        self.path = path
+        self.stats = {}  # (player, layout) -> PlayerStats
+        self.queue = queue.Queue()
+        self.write_errors = 0
+
+        connection = sqlite3.connect(path)
+        try:
+            with connection:
+                connection.executescript(self.SCHEMA)
+            rows = connection.execute(
+                "SELECT player, layout, COUNT(*), SUM(won), MIN(CASE WHEN won THEN seconds END) "
+                "FROM games GROUP BY player, layout").fetchall()
+            if not rows:
+                rows = self._import_legacy_best_time(connection)
+        finally:
+            connection.close()
+
+        for player, layout, games, wins, best_time in rows:
+            self.stats[(player, layout)] = PlayerStats(games, wins or 0, best_time or 0)
+
+        self.writer = threading.Thread(target=self._write_loop, name='stats-writer', daemon=True)
+        self.writer.start()
+
+    def _import_legacy_best_time(self, connection):
+        """Перенос рекорда из best_time.txt (он был общим - записывается на игрока и раскладку по умолчанию)"""
+        try:
+            with open(BEST_TIME_FILE, 'r') as f:
+                best_time = float(f.read())
+        except (OSError, ValueError):
+            return []
+        if best_time <= 0:
+            return []
+
+        with connection:
+            connection.execute("INSERT INTO games (player, layout, won, seconds, played_at) VALUES (?, ?, 1, ?, ?)",
+                               (DEFAULT_PLAYER, DEFAULT_LAYOUT_KEY, best_time, os.path.getmtime(BEST_TIME_FILE)))
+        return [(DEFAULT_PLAYER, DEFAULT_LAYOUT_KEY, 1, 1, best_time)]
+
+    def get(self, player, layout):
+        """Сводка игрока по раскладке (пустая, если партий не было)"""
+        return self.stats.get((player, layout)) or PlayerStats()
+
+    def best_time(self, player, layout=None):
+        """Лучшее время игрока на раскладке или на всех раскладках (0 - побед не было)"""
+        if layout is not None:
+            return self.get(player, layout).best_time
+        times = [stats.best_time for (name, _), stats in self.stats.items() if name == player and stats.best_time]
+        return min(times) if times else 0
+
+    def totals(self, player):
+        """Сводка игрока по всем раскладкам"""
+        total = PlayerStats()
+        for (name, _), stats in self.stats.items():
+            if name == player:
+                total.games += stats.games
+                total.wins += stats.wins
+        total.best_time = self.best_time(player)
+        return total
+
+    def record_game(self, player, layout, won, seconds):
+        """Учёт законченной партии: сводка обновляется сразу, запись в базу - в фоне"""
+        key = (player, layout)
+        if key not in self.stats:
+            self.stats[key] = PlayerStats()
+        self.stats[key].add(won, seconds)
+        self.queue.put((player, layout, 1 if won else 0, seconds, time.time()))
+
+    def history(self, player, layout=None, limit=20):
+        """Последние партии игрока из базы: список (layout, won, seconds, played_at)"""
+        self.flush()
+        connection = sqlite3.connect(self.path)
+        try:
+            if layout is None:
+                rows = connection.execute(
+                    "SELECT layout, won, seconds, played_at FROM games WHERE player = ? "
+                    "ORDER BY played_at DESC, id DESC LIMIT ?", (player, limit))
+            else:
+                rows = connection.execute(
+                    "SELECT layout, won, seconds, played_at FROM games WHERE player = ? AND layout = ? "
+                    "ORDER BY played_at DESC, id DESC LIMIT ?", (player, layout, limit))
+            return [(layout, bool(won), seconds, played_at) for layout, won, seconds, played_at in rows]
+        finally:
+            connection.close()
+
+    def _write_loop(self):
+        connection = sqlite3.connect(self.path)
+        try:
+            while True:
+                item = self.queue.get()
+                batch = [item]
+                # Всё, что накопилось к этому моменту, пишется одной транзакцией
+                while True:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                rows = [row for row in batch if row is not None]
+                try:
+                    if rows:
+                        with connection:
+                            connection.executemany(
+                                "INSERT INTO games (player, layout, won, seconds, played_at) VALUES (?, ?, ?, ?, ?)",
+                                rows)
+                except sqlite3.Error as e:
+                    self.write_errors += 1
+                    print(f"Не удалось сохранить статистику: {e}")
+                finally:
+                    for _ in batch:
+                        self.queue.task_done()
+
+                if None in batch:
+                    return
+        finally:
+            connection.close()
+
+    def flush(self):
+        """Ожидание записи всех учтённых партий"""
+        self.queue.join()
+
+    def close(self):
+        """Запись оставшегося и остановка фонового потока"""
+        if self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
+
+
+_stats_store = None
+
+
+def get_stats_store():
+    """Общее хранилище статистики (открывается при первом обращении)"""
+    global _stats_store
+    if _stats_store is None:
+        _stats_store = StatsStore(STATS_FILE)
+    return _stats_store
+
+
+def close_stats_store():
+    global _stats_store
+    if _stats_store is not None:
+        _stats_store.close()
+        _stats_store = None
@@ -0,0 +1,59 @@
+import threading
+from collections import OrderedDict
+import pygame
+import profiler
+from constants import *
+
+# SDL_ttf не потокобезопасен: шрифты открываются и рисуют надписи только под этой
+# блокировкой (изображения плиток с номерами генерируются в фоновом потоке)
+FONT_LOCK = threading.Lock()
+
+
+class TextCache:
+    """Общий ограниченный кэш отрисованных надписей (ключ - шрифт, текст, цвет, сглаживание)"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def render(self, font, text, color=COLOR_WHITE, antialias=True):
+        """Надпись из кэша; font.render вызывается только при промахе"""
+        key = (font, text, tuple(color), antialias)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        if profiler.ENABLED:
+            profiler.count('surface')
+        with FONT_LOCK:
+            surface = font.render(text, antialias, color)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+
+        self.entries[key] = surface
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
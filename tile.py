@@ -1,62 +1,142 @@
 import pygame
+import profiler
+from tile_store import TileStore
 from constants import *
 
 
 class Tile:
-    """Класс плитки маджонга"""
+    """Класс плитки маджонга: представление одной строки хранилища TileStore"""
+
+    __slots__ = ('store', 'index')
 
     def __init__(self, tile_type, x, y, z=0):
-        self.tile_type = tile_type
-        self.x = x
-        self.y = y
-        self.z = z
-        self.selected = False
-        self.removed = False
-        self.rect = pygame.Rect(0, 0, TILE_WIDTH, TILE_HEIGHT)
+        # Отдельная плитка получает собственное хранилище из одной строки
+        self.store = TileStore()
+        self.index = self.store.append(tile_type, x, y, z)
+
+    @classmethod
+    def view(cls, store, index):
+        """Представление строки index существующего хранилища"""
+        tile = cls.__new__(cls)
+        tile.store = store
+        tile.index = index
+        return tile
+
+    @property
+    def tile_type(self):
+        return self.store.tile_type[self.index]
+
+    @tile_type.setter
+    def tile_type(self, value):
+        self.store.tile_type[self.index] = value
+
+    @property
+    def x(self):
+        return self.store.x[self.index]
+
+    @x.setter
+    def x(self, value):
+        self.store.x[self.index] = value
         self.update_position()
 
+    @property
+    def y(self):
+        return self.store.y[self.index]
+
+    @y.setter
+    def y(self, value):
+        self.store.y[self.index] = value
+        self.update_position()
+
+    @property
+    def z(self):
+        return self.store.z[self.index]
+
+    @z.setter
+    def z(self, value):
+        self.store.z[self.index] = value
+        self.update_position()
+
+    @property
+    def removed(self):
+        return bool(self.store.removed[self.index])
+
+    @removed.setter
+    def removed(self, value):
+        self.store.removed[self.index] = 1 if value else 0
+
+    @property
+    def selected(self):
+        return bool(self.store.selected[self.index])
+
+    @selected.setter
+    def selected(self, value):
+        self.store.selected[self.index] = 1 if value else 0
+
+    @property
+    def rect(self):
+        """Область плитки на экране (новый Rect по координатам из хранилища)"""
+        return pygame.Rect(self.store.rect_x[self.index], self.store.rect_y[self.index], TILE_WIDTH, TILE_HEIGHT)
+
+    @property
+    def graph(self):
+        """Граф блокировок раскладки (BlockingGraph) или None"""
+        return self.store.graph
+
     def update_position(self):
         """Обновление позиции плитки на экране"""
-        field_offset_x = (SCREEN_WIDTH - 1080) // 2  # Центрирование поля
-        field_offset_y = 50  # Отступ сверху
+        self.store.update_position(self.index)
+
+    def screen_rect(self, camera=None):
+        """Область плитки на экране с учётом камеры (без камеры - координаты поля)"""
+        return self.rect if camera is None else camera.rect_to_screen(self.rect)
 
-        self.rect.x = field_offset_x + self.x - self.z * 5
-        self.rect.y = field_offset_y + self.y - self.z * 5
-        self.rect.width = TILE_WIDTH
-        self.rect.height = TILE_HEIGHT
+    @staticmethod
+    def _scale(length, camera):
+        return length if camera is None else camera.scale(length)
 
-    def draw(self, surface, tile_images):
-        """Отрисовка плитки"""
+    def get_bounds(self, camera=None):
+        """Область экрана, которую занимает плитка вместе с тенью и выделением"""
+        rect = self.screen_rect(camera)
+        frame = self._scale(4, camera)
+        shadow = self._scale(3, camera)
+        return rect.inflate(frame, frame).union(rect.move(shadow, shadow))
+
+    def draw(self, surface, atlas, with_selection=True, camera=None):
+        """Отрисовка плитки из атласа спрайтов (atlas - для масштаба камеры)"""
         if self.removed:
             return
+        rect = self.screen_rect(camera)
 
         # Тень
-        shadow_rect = self.rect.move(3, 3)
-        shadow = pygame.Surface((TILE_WIDTH, TILE_HEIGHT), pygame.SRCALPHA)
-        shadow.fill((0, 0, 0, 100))
-        surface.blit(shadow, shadow_rect)
+        shadow = self._scale(3, camera)
+        surface.blit(atlas.surface, rect.move(shadow, shadow), atlas.shadow)
 
         # Сама плитка
-        if tile_images and self.tile_type in tile_images:
-            surface.blit(tile_images[self.tile_type], self.rect)
-        else:
-            color = [
-                COLOR_RED, COLOR_GREEN, COLOR_BLUE,
-                COLOR_YELLOW, COLOR_PINK, COLOR_WHITE
-            ][self.tile_type % 6]
-            pygame.draw.rect(surface, color, self.rect, border_radius=5)
-            pygame.draw.rect(surface, COLOR_BLACK, self.rect, 2, border_radius=5)
-            font = pygame.font.SysFont('Arial', 20)
-            text = font.render(str(self.tile_type), True, COLOR_BLACK)
-            text_rect = text.get_rect(center=self.rect.center)
-            surface.blit(text, text_rect)
-
-        # Выделение
+        surface.blit(atlas.surface, rect, atlas.face(self.tile_type))
+
+        if with_selection:
+            self.draw_selection(surface, atlas, camera)
+
+    def draw_selection(self, surface, atlas, camera=None):
+        """Отрисовка выделения плитки"""
         if self.selected:
-            pygame.draw.rect(surface, COLOR_RED, self.rect.inflate(4, 4), 2, border_radius=7)
+            frame = self._scale(4, camera)
+            surface.blit(atlas.surface, self.screen_rect(camera).inflate(frame, frame), atlas.selection)
+
+    def draw_hint(self, surface, atlas, camera=None):
+        """Отрисовка подсветки подсказки"""
+        frame = self._scale(4, camera)
+        surface.blit(atlas.surface, self.screen_rect(camera).inflate(frame, frame), atlas.hint)
 
     def is_covered(self, all_tiles):
         """Проверка, закрыта ли плитка другими"""
+        if profiler.ENABLED:
+            profiler.count('is_covered')
+        graph = self.store.graph
+        if graph is not None:
+            return graph.is_covered(self.index, self.store.removed)
+
         for tile in all_tiles:
             if tile != self and not tile.removed and self.is_covered_by(tile):
                 return True
@@ -73,6 +153,13 @@ class Tile:
 
     def is_blocked(self, tiles):
         """Проверка, заблокирована ли плитка"""
+        if profiler.ENABLED:
+            profiler.count('is_blocked')
+        graph = self.store.graph
+        if graph is not None:
+            removed = self.store.removed
+            return graph.is_covered(self.index, removed) or graph.is_side_blocked(self.index, removed)
+
         for tile in tiles:
             if tile != self and not tile.removed and tile.z > self.z:
                 if (abs(tile.rect.x - self.rect.x) < TILE_WIDTH and
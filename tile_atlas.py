@@ -0,0 +1,132 @@
+import pygame
+import profiler
+from constants import *
+from text_cache import FONT_LOCK
+
+
+class TileAtlas:
+    """Атлас спрайтов плиток: лица, тень, выделение, подсказка и запасные цветные лица"""
+
+    COLUMNS = 16
+    CELL_WIDTH = TILE_WIDTH + 4  # С запасом под рамку выделения
+    CELL_HEIGHT = TILE_HEIGHT + 4
+
+    def __init__(self, tile_images):
+        self.faces = {}  # tile_type -> область лица в атласе
+        self.scaled_atlases = {}  # масштаб -> ScaledAtlas
+        self.slots = 0
+        self.surface = None
+        self.fallback_font = None
+
+        self._grow(len(tile_images) + 3)
+
+        self.shadow = self._allocate()
+        self.surface.fill((0, 0, 0, 100), self.shadow)
+
+        self.selection = self._allocate(self.CELL_WIDTH, self.CELL_HEIGHT)
+        pygame.draw.rect(self.surface, COLOR_RED, self.selection, 2, border_radius=7)
+
+        self.hint = self._allocate(self.CELL_WIDTH, self.CELL_HEIGHT)
+        pygame.draw.rect(self.surface, COLOR_GREEN, self.hint, 2, border_radius=7)
+
+        for tile_type, image in tile_images.items():
+            rect = self._allocate()
+            self.surface.blit(image, rect, special_flags=pygame.BLEND_RGBA_ADD)
+            self.faces[tile_type] = rect
+
+        self.convert()
+
+    def _grow(self, slots):
+        """Увеличение атласа до заданного числа ячеек с сохранением содержимого"""
+        if profiler.ENABLED:
+            profiler.count('surface')
+        rows = (slots + self.COLUMNS - 1) // self.COLUMNS
+        surface = pygame.Surface((self.COLUMNS * self.CELL_WIDTH, rows * self.CELL_HEIGHT), pygame.SRCALPHA)
+        if self.surface is not None:
+            # Сложение с прозрачным фоном копирует пиксели без смешивания
+            surface.blit(self.surface, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+        self.surface = surface
+        self.capacity = rows * self.COLUMNS
+
+    def _allocate(self, width=TILE_WIDTH, height=TILE_HEIGHT):
+        """Выделение следующей свободной ячейки атласа"""
+        if self.slots == self.capacity:
+            self._grow(self.capacity * 2)
+            self.convert()
+        row, column = divmod(self.slots, self.COLUMNS)
+        self.slots += 1
+        return pygame.Rect(column * self.CELL_WIDTH, row * self.CELL_HEIGHT, width, height)
+
+    def convert(self):
+        """Перевод атласа в формат дисплея (если он уже создан)"""
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert_alpha()
+
+    def scaled(self, zoom):
+        """Атлас для масштаба камеры: уменьшенные копии готовятся один раз на уровень масштаба"""
+        if zoom == 1:
+            return self
+        atlas = self.scaled_atlases.get(zoom)
+        if atlas is None or atlas.slots != self.slots:
+            # Новые лица добавились после масштабирования - копия устарела
+            atlas = self.scaled_atlases[zoom] = ScaledAtlas(self, zoom)
+        return atlas
+
+    def face(self, tile_type):
+        """Область лица плитки в атласе"""
+        rect = self.faces.get(tile_type)
+        if rect is None:
+            rect = self._add_fallback_face(tile_type)
+        return rect
+
+    def ensure_faces(self, tile_types):
+        """Заблаговременная подготовка лиц для всех типов раскладки"""
+        for tile_type in tile_types:
+            self.face(tile_type)
+
+    def _add_fallback_face(self, tile_type):
+        """Запасное цветное лицо для типа без изображения"""
+        with FONT_LOCK:
+            if self.fallback_font is None:
+                self.fallback_font = pygame.font.SysFont('Arial', 20)
+            text = self.fallback_font.render(str(tile_type), True, COLOR_BLACK)
+
+        rect = self._allocate()
+        color = [
+            COLOR_RED, COLOR_GREEN, COLOR_BLUE,
+            COLOR_YELLOW, COLOR_PINK, COLOR_WHITE
+        ][tile_type % 6]
+        pygame.draw.rect(self.surface, color, rect, border_radius=5)
+        pygame.draw.rect(self.surface, COLOR_BLACK, rect, 2, border_radius=5)
+        self.surface.blit(text, text.get_rect(center=rect.center))
+
+        self.faces[tile_type] = rect
+        return rect
+
+
+class ScaledAtlas:
+    """Копия атласа плиток для одного масштаба (те же области, умноженные на масштаб)"""
+
+    def __init__(self, atlas, zoom):
+        if profiler.ENABLED:
+            profiler.count('surface')
+        self.atlas = atlas
+        self.zoom = zoom
+        self.slots = atlas.slots
+        width, height = atlas.surface.get_size()
+        self.surface = pygame.transform.smoothscale(atlas.surface, (round(width * zoom), round(height * zoom)))
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert_alpha()
+
+        self.shadow = self._scale(atlas.shadow)
+        self.selection = self._scale(atlas.selection)
+        self.hint = self._scale(atlas.hint)
+        self.faces = {tile_type: self._scale(rect) for tile_type, rect in atlas.faces.items()}
+
+    def _scale(self, rect):
+        zoom = self.zoom
+        return pygame.Rect(round(rect.x * zoom), round(rect.y * zoom), round(rect.width * zoom), round(rect.height * zoom))
+
+    def face(self, tile_type):
+        """Область лица в копии (лица готовятся заранее через TileAtlas.ensure_faces)"""
+        return self.faces[tile_type]
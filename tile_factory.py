@@ -1,24 +1,124 @@
+import hashlib
+import json
+import os
 import pygame
 from tile import Tile
+from tile_store import TileStore
+from tile_atlas import TileAtlas
+from text_cache import FONT_LOCK
 from constants import *
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Изображения плиток, уже загруженные в этом процессе (ключ - хэш параметров)
+_tile_images_cache = {}
+
 
 class TileFactory:
     """Фабрика для создания плиток"""
 
+    TILE_COLORS = [COLOR_RED, COLOR_GREEN, COLOR_BLUE,
+                   COLOR_YELLOW, COLOR_WHITE, (255, 0, 255), (0, 255, 255)]
+    FONT_SIZE = 20
+    CACHE_VERSION = 1
+
     @staticmethod
     def create_tile(tile_type, x, y, z=0):
         """Создание новой плитки"""
         return Tile(tile_type, x, y, z)
 
     @staticmethod
-    def create_tile_images(resource_manager, count=36):
-        """Создание изображений плиток"""
+    def create_tiles(layout):
+        """Создание плиток поля из списка (type, x, y, z) в общем хранилище"""
+        return TileStore.from_layout(layout)
+
+    @staticmethod
+    def create_tile_images(resource_manager, count=TILE_TYPES):
+        """Получение изображений плиток: из памяти, из кэша на диске или генерацией"""
+        key = TileFactory.tile_images_key(count)
+        tile_images = _tile_images_cache.get(key)
+        if tile_images is None:
+            tile_images = TileFactory.load_cached_tile_images(key, count)
+            if tile_images is None:
+                tile_images = TileFactory.generate_tile_images(resource_manager, count)
+                TileFactory.save_cached_tile_images(key, tile_images)
+            _tile_images_cache[key] = tile_images
+        return tile_images
+
+    @staticmethod
+    def tile_images_key(count):
+        """Хэш всех параметров, от которых зависят изображения плиток"""
+        font_path = os.path.abspath(FONT_FILE)
+        if os.path.exists(font_path):
+            stat = os.stat(font_path)
+            font = (font_path, stat.st_size, stat.st_mtime)
+        else:
+            font = ('Arial', 'bold')
+
+        params = (TileFactory.CACHE_VERSION, pygame.version.ver, TILE_WIDTH, TILE_HEIGHT,
+                  TileFactory.TILE_COLORS, font, TileFactory.FONT_SIZE, count)
+        return hashlib.sha1(repr(params).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def load_cached_tile_images(key, count):
+        """Загрузка изображений плиток из кэша на диске (None - кэш устарел или повреждён)"""
+        try:
+            with open(TILE_CACHE_MANIFEST, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('key') != key or manifest.get('count') != count:
+                return None
+
+            sheet = pygame.image.load(TILE_CACHE_IMAGE)
+            if sheet.get_size() != (TILE_WIDTH * count, TILE_HEIGHT):
+                return None
+
+            tile_images = {}
+            for i in range(1, count + 1):
+                rect = pygame.Rect((i - 1) * TILE_WIDTH, 0, TILE_WIDTH, TILE_HEIGHT)
+                tile_images[i] = sheet.subsurface(rect).copy()
+            return tile_images
+        except Exception:
+            return None
+
+    @staticmethod
+    def save_cached_tile_images(key, tile_images):
+        """Сохранение изображений плиток в кэш на диске одним изображением и манифестом"""
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            count = len(tile_images)
+            sheet = pygame.Surface((TILE_WIDTH * count, TILE_HEIGHT), pygame.SRCALPHA)
+            for i in range(1, count + 1):
+                sheet.blit(tile_images[i], ((i - 1) * TILE_WIDTH, 0), special_flags=pygame.BLEND_RGBA_ADD)
+
+            # Запись через временные файлы, чтобы не оставить кэш наполовину записанным
+            image_tmp = TILE_CACHE_IMAGE + '.tmp.png'
+            manifest_tmp = TILE_CACHE_MANIFEST + '.tmp'
+            pygame.image.save(sheet, image_tmp)
+            with open(manifest_tmp, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'count': count, 'width': TILE_WIDTH, 'height': TILE_HEIGHT}, f)
+            os.replace(image_tmp, TILE_CACHE_IMAGE)
+            os.replace(manifest_tmp, TILE_CACHE_MANIFEST)
+        except Exception as e:
+            print(f"Не удалось сохранить кэш плиток: {e}")
+
+    @staticmethod
+    def generate_tile_images(resource_manager, count=TILE_TYPES):
+        """Генерация изображений плиток (пакетно через NumPy, если он установлен)"""
+        if numpy is not None:
+            return TileFactory.generate_tile_images_arrays(resource_manager, count)
+        return TileFactory.generate_tile_images_lines(resource_manager, count)
+
+    @staticmethod
+    def generate_tile_images_lines(resource_manager, count=TILE_TYPES):
+        """Генерация изображений плиток построчной отрисовкой градиента"""
         tile_images = {}
-        colors = [COLOR_RED, COLOR_GREEN, COLOR_BLUE,
-                  COLOR_YELLOW, COLOR_WHITE, (255, 0, 255), (0, 255, 255)]
+        colors = TileFactory.TILE_COLORS
 
-        font = resource_manager.load_font('small', 20)
+        font = resource_manager.load_font('small', TileFactory.FONT_SIZE)
 
         for i in range(1, count + 1):
             color = colors[i % len(colors)]
@@ -30,14 +130,62 @@ class TileFactory:
                 line_color = (min(color[0] + 20, 255), min(color[1] + 20, 255), min(color[2] + 20, 255), alpha)
                 pygame.draw.line(tile_surface, line_color, (2, y_pos), (TILE_WIDTH - 3, y_pos))
 
-            pygame.draw.rect(tile_surface, COLOR_BLACK,
-                             (2, 2, TILE_WIDTH - 4, TILE_HEIGHT - 4), 2, border_radius=5)
+            TileFactory.finish_tile_face(tile_surface, i, font)
+            tile_images[i] = tile_surface
+
+        return tile_images
+
+    @staticmethod
+    def generate_tile_images_arrays(resource_manager, count=TILE_TYPES):
+        """Генерация изображений плиток: градиенты строятся разом в массивах NumPy"""
+        tile_images = {}
+        colors = numpy.array(TileFactory.TILE_COLORS, dtype=numpy.int32)
+
+        font = resource_manager.load_font('small', TileFactory.FONT_SIZE)
+
+        # Градиент зависит только от цвета, поэтому строится по одному на цвет,
+        # все сразу одним листом RGBA (строки подряд в памяти)
+        line_colors = numpy.minimum(colors + 20, 255).astype(numpy.uint8)
+        rows_alpha = (255 - (numpy.arange(TILE_HEIGHT) * 0.5).astype(numpy.int32)).astype(numpy.uint8)
 
-            # Номер плитки
-            text = font.render(str(i), True, COLOR_BLACK)
-            text_rect = text.get_rect(center=(TILE_WIDTH // 2, TILE_HEIGHT // 2))
-            tile_surface.blit(text, text_rect)
+        pixels = numpy.zeros((len(colors), TILE_HEIGHT, TILE_WIDTH, 4), dtype=numpy.uint8)
+        pixels[:, :, 2:TILE_WIDTH - 2, :3] = line_colors[:, None, None, :]
+        pixels[:, :, 2:TILE_WIDTH - 2, 3] = rows_alpha[None, :, None]
 
+        sheet = pygame.image.frombuffer(pixels.tobytes(), (TILE_WIDTH, TILE_HEIGHT * len(colors)), 'RGBA')
+        gradients = [
+            sheet.subsurface((0, index * TILE_HEIGHT, TILE_WIDTH, TILE_HEIGHT))
+            for index in range(len(colors))
+        ]
+
+        for i in range(1, count + 1):
+            tile_surface = gradients[i % len(colors)].copy()
+            TileFactory.finish_tile_face(tile_surface, i, font)
             tile_images[i] = tile_surface
 
         return tile_images
+
+    @staticmethod
+    def finish_tile_face(tile_surface, tile_type, font):
+        """Рамка и номер поверх градиента плитки"""
+        pygame.draw.rect(tile_surface, COLOR_BLACK,
+                         (2, 2, TILE_WIDTH - 4, TILE_HEIGHT - 4), 2, border_radius=5)
+
+        # Номер плитки
+        with FONT_LOCK:  # Может выполняться в потоке фоновой загрузки
+            text = font.render(str(tile_type), True, COLOR_BLACK)
+        text_rect = text.get_rect(center=(TILE_WIDTH // 2, TILE_HEIGHT // 2))
+        tile_surface.blit(text, text_rect)
+
+    @staticmethod
+    def preload_tile_images(resource_manager, count=TILE_TYPES):
+        """Фоновая подготовка изображений плиток (до начала партии)"""
+        return resource_manager.preload(f"tile_images:{count}", TileFactory.create_tile_images, resource_manager, count)
+
+    @staticmethod
+    def create_tile_atlas(resource_manager, count=TILE_TYPES):
+        """Создание атласа спрайтов плиток (дожидается фоновой подготовки, если она запущена)"""
+        tile_images = resource_manager.preloaded(f"tile_images:{count}")
+        if tile_images is None:
+            tile_images = TileFactory.create_tile_images(resource_manager, count)
+        return TileAtlas(tile_images)
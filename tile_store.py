@@ -0,0 +1,134 @@
+from array import array
+from constants import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TileStore:
+    """Плитки поля в типизированных массивах (структура массивов)
+
+    Tile - лёгкое представление одной строки хранилища. Запросы ко всему полю
+    (маска доступных плиток, поиск плиток под курсором) выполняются над массивами
+    целиком, через NumPy, если он установлен.
+    """
+
+    def __init__(self):
+        self.tile_type = array('i')
+        self.x = array('i')
+        self.y = array('i')
+        self.z = array('i')
+        self.rect_x = array('i')
+        self.rect_y = array('i')
+        self.removed = bytearray()
+        self.selected = bytearray()
+        self.graph = None  # Граф блокировок раскладки (BlockingGraph)
+        self.views = None
+
+    @classmethod
+    def from_layout(cls, layout):
+        """Хранилище из списка (type, x, y, z)"""
+        store = cls()
+        for tile_type, x, y, z in layout:
+            store.append(tile_type, x, y, z)
+        return store
+
+    def __len__(self):
+        return len(self.tile_type)
+
+    def append(self, tile_type, x, y, z=0):
+        """Добавление плитки; возвращает её номер"""
+        self.tile_type.append(tile_type)
+        self.x.append(x)
+        self.y.append(y)
+        self.z.append(z)
+        self.rect_x.append(0)
+        self.rect_y.append(0)
+        self.removed.append(0)
+        self.selected.append(0)
+        self.views = None
+
+        index = len(self.tile_type) - 1
+        self.update_position(index)
+        return index
+
+    def update_position(self, index):
+        """Обновление позиции плитки на поле (на экран её переводит камера GameScreen)"""
+        field_offset_x = (SCREEN_WIDTH - 1080) // 2  # Центрирование поля
+        field_offset_y = 50  # Отступ сверху
+
+        self.rect_x[index] = field_offset_x + self.x[index] - self.z[index] * 5
+        self.rect_y[index] = field_offset_y + self.y[index] - self.z[index] * 5
+
+    def positions(self):
+        """Позиции плиток (x, y, z) в порядке хранения"""
+        return list(zip(self.x, self.y, self.z))
+
+    def tile(self, index):
+        """Представление Tile для строки хранилища"""
+        return self.tiles()[index]
+
+    def tiles(self):
+        """Список представлений Tile (создаётся один раз)"""
+        if self.views is None:
+            from tile import Tile
+            self.views = [Tile.view(self, index) for index in range(len(self))]
+        return self.views
+
+    def remove_pair(self, first, second):
+        """Снятие пары"""
+        for index in (first, second):
+            self.removed[index] = 1
+            self.selected[index] = 0
+
+    def restore_pair(self, first, second):
+        """Возврат снятой пары на поле"""
+        for index in (first, second):
+            self.removed[index] = 0
+
+    def reset(self):
+        """Возврат всех плиток на поле"""
+        count = len(self)
+        self.removed[:] = bytes(count)
+        self.selected[:] = bytes(count)
+
+    def free_mask(self, graph=None):
+        """Маска доступных плиток (bytearray: 1 - плитку можно снять)"""
+        graph = graph or self.graph
+        count = len(self)
+        if numpy is None or not count:
+            return bytearray(1 if graph.is_free(index, self.removed) else 0 for index in range(count))
+
+        removed = numpy.frombuffer(self.removed, dtype=numpy.uint8).astype(bool)
+        covered, coverer = graph.edge_arrays('covered_by')
+        live_covers = numpy.bincount(covered[~removed[coverer]], minlength=count)
+        free = ~removed & (live_covers == 0)
+
+        if SIDE_BLOCKING:
+            sides = []
+            for relation in ('left', 'right'):
+                tiles, neighbours = graph.edge_arrays(relation)
+                sides.append(numpy.bincount(tiles[~removed[neighbours]], minlength=count) > 0)
+            free &= ~(sides[0] & sides[1])
+
+        return bytearray(free.astype(numpy.uint8).tobytes())
+
+    def tiles_at(self, pos):
+        """Номера живых плиток, под которыми находится точка экрана"""
+        px, py = pos
+        count = len(self)
+        if numpy is None or not count:
+            rect_x, rect_y, removed = self.rect_x, self.rect_y, self.removed
+            return [index for index in range(count)
+                    if not removed[index]
+                    and rect_x[index] <= px < rect_x[index] + TILE_WIDTH
+                    and rect_y[index] <= py < rect_y[index] + TILE_HEIGHT]
+
+        rect_x = numpy.frombuffer(self.rect_x, dtype=numpy.int32)
+        rect_y = numpy.frombuffer(self.rect_y, dtype=numpy.int32)
+        removed = numpy.frombuffer(self.removed, dtype=numpy.uint8)
+        hit = ((removed == 0) & (rect_x <= px) & (px < rect_x + TILE_WIDTH)
+               & (rect_y <= py) & (py < rect_y + TILE_HEIGHT))
+        return numpy.flatnonzero(hit).tolist()
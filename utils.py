@@ -1,7 +1,12 @@
 import os
 import pygame
 import time
+from concurrent.futures import ThreadPoolExecutor
+from asset_cache import AssetCache
 from constants import *
+from layout_generator import is_generated_layout, read_generated_layout
+from layout_pack import is_layout_pack, read_pack_layout
+from text_cache import TextCache, FONT_LOCK
 
 
 class TimeManager:
@@ -19,7 +24,8 @@ class TimeManager:
 
     def pause(self):
         """Пауза таймера"""
-        self.pause_start = time.time()
+        if not self.pause_start:
+            self.pause_start = time.time()
 
     def resume(self):
         """Возобновление таймера"""
@@ -32,6 +38,13 @@ class TimeManager:
         if not self.pause_start:
             self.current_time = time.time() - self.start_time - self.paused_time
 
+    def seconds_until_tick(self):
+        """Сколько секунд осталось до смены показываемой секунды (None - таймер на паузе)"""
+        if self.pause_start:
+            return None
+        elapsed = time.time() - self.start_time - self.paused_time
+        return 1 - elapsed % 1
+
     def get_formatted_time(self):
         """Получение отформатированного времени (MM:SS)"""
         minutes = int(self.current_time // 60)
@@ -47,38 +60,59 @@ class TimeManager:
 
 
 class ResourceManager:
-    """Класс для управления ресурсами (шрифты, изображения)"""
-
-    def __init__(self):
-        self.fonts = {}
-        self.images = {}
+    """Класс для управления ресурсами (шрифты, изображения)
+
+    Шрифты и изображения хранятся в ограниченном LRU-кэше (AssetCache).
+    Медленные ресурсы можно загружать заранее в фоновых потоках (preload_*):
+    пока загрузка идёт, load_image возвращает None вместо изображения, а
+    обработчики готовности выполняются в главном потоке из poll().
+    """
+
+    def __init__(self, max_bytes=ASSET_CACHE_BYTES):
+        self.assets = AssetCache(max_bytes, retry_after=ASSET_RETRY_SECONDS)  # Шрифты и изображения
+        self.texts = TextCache(TEXT_CACHE_ENTRIES)  # Отрисованные надписи, общие для всех экранов
+        self.music_loaded = False
+        self.executor = None
+        self.preloads = {}  # имя -> Future
+        self.callbacks = []  # (Future, функция) для вызова в главном потоке
 
     def load_font(self, name, size):
         """Загрузка шрифта"""
-        key = f"{name}_{size}"
-        if key not in self.fonts:
+        return self.assets.get(('font', name, size), lambda: self._read_font(size))
+
+    def _read_font(self, size):
+        with FONT_LOCK:
             try:
                 font_path = os.path.abspath(FONT_FILE)
                 if os.path.exists(font_path):
-                    self.fonts[key] = pygame.font.Font(font_path, size)
+                    return pygame.font.Font(font_path, size)
                 else:
                     raise FileNotFoundError
             except:
-                self.fonts[key] = pygame.font.SysFont('Arial', size, bold=True)
-        return self.fonts[key]
+                return pygame.font.SysFont('Arial', size, bold=True)
 
     def load_image(self, path):
-        """Загрузка изображения"""
-        if path not in self.images:
-            try:
-                img_path = os.path.abspath(path)
-                if os.path.exists(img_path):
-                    self.images[path] = pygame.image.load(img_path)
-                else:
-                    self.images[path] = None
-            except:
-                self.images[path] = None
-        return self.images[path]
+        """Загрузка изображения (None, пока идёт фоновая загрузка или если файла нет)"""
+        future = self.preloads.get(f"image:{path}")
+        if future is not None and not future.done():
+            return None
+        return self._read_image(path)
+
+    def _read_image(self, path):
+        return self.assets.get(('image', path), lambda: self._load_image_file(path))
+
+    def _load_image_file(self, path):
+        try:
+            img_path = os.path.abspath(path)
+            if os.path.exists(img_path):
+                return pygame.image.load(img_path)
+        except Exception as e:
+            print(f"Не удалось загрузить изображение {path}: {e}")
+        return None
+
+    def cache_stats(self):
+        """Статистика кэша шрифтов и изображений"""
+        return self.assets.stats()
 
     def load_music(self, path):
         """Загрузка музыки"""
@@ -99,20 +133,91 @@ class ResourceManager:
         """Остановка музыки"""
         pygame.mixer.music.stop()
 
-
-def save_best_time(time_value):
-    """Сохранение лучшего времени в файл"""
-    try:
-        with open(BEST_TIME_FILE, 'w') as f:
-            f.write(str(time_value))
-    except:
-        pass
-
-
-def load_best_time():
-    """Загрузка лучшего времени из файла"""
-    try:
-        with open(BEST_TIME_FILE, 'r') as f:
-            return float(f.read())
-    except:
-        return 0
+    def preload(self, name, loader, *args, callback=None):
+        """Фоновая загрузка ресурса: Future с результатом loader(*args)
+
+        Повторный вызов с тем же именем возвращает уже запущенную загрузку.
+        callback(результат) вызывается в главном потоке из poll()."""
+        future = self.preloads.get(name)
+        if future is None:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=PRELOAD_WORKERS, thread_name_prefix='preload')
+            future = self.executor.submit(loader, *args)
+            self.preloads[name] = future
+        if callback is not None:
+            self.callbacks.append((future, callback))
+        return future
+
+    def preload_image(self, path):
+        return self.preload(f"image:{path}", self._read_image, path)
+
+    def preload_music(self, path, play=True):
+        """Фоновая загрузка музыки; воспроизведение начнётся, когда она будет готова"""
+        return self.preload(f"music:{path}", self.load_music, path,
+                            callback=(lambda _: self.play_music()) if play else None)
+
+    def preloaded(self, name, timeout=None):
+        """Результат фоновой загрузки (ждёт её окончания); None - не запускалась или не удалась"""
+        future = self.preloads.get(name)
+        if future is None:
+            return None
+        try:
+            return future.result(timeout)
+        except Exception as e:
+            print(f"Не удалось загрузить {name}: {e}")
+            return None
+
+    def is_ready(self, *names):
+        """Завершены ли фоновые загрузки (все, если имена не заданы)"""
+        futures = [self.preloads[name] for name in names if name in self.preloads] if names \
+            else list(self.preloads.values())
+        return all(future.done() for future in futures)
+
+    def preload_progress(self):
+        """Доля завершённых фоновых загрузок (1.0 - всё загружено)"""
+        if not self.preloads:
+            return 1.0
+        return sum(future.done() for future in self.preloads.values()) / len(self.preloads)
+
+    def poll(self):
+        """Вызов обработчиков завершившихся загрузок (из главного потока, раз в кадр)"""
+        if not self.callbacks:
+            return
+        pending = []
+        for future, callback in self.callbacks:
+            if not future.done():
+                pending.append((future, callback))
+            elif future.exception() is None:
+                callback(future.result())
+        self.callbacks = pending
+
+    def shutdown(self):
+        """Остановка фоновых загрузок при выходе (идущие дожидаются - им ещё нужен pygame)"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+
+def read_layout_file(filename):
+    """Чтение раскладки из файла уровня (строки type,x,y,z), из пакета ('levels.mjl#имя')
+    или сгенерированной ('@turtle:1000')"""
+    if is_layout_pack(filename):
+        return read_pack_layout(filename)
+    if is_generated_layout(filename):
+        return read_generated_layout(filename)
+
+    layout = []
+    with open(filename, 'r') as f:
+        for line in f:
+            parts = line.strip().split(',')
+            if len(parts) == 4:
+                layout.append(tuple(map(int, parts)))
+    return layout
+
+
+def layout_positions(filename=None, layout_index=0):
+    """Позиции плиток партии (x, y, z): из файла уровня или встроенной раскладки"""
+    if filename:
+        return [(x, y, z) for _, x, y, z in read_layout_file(filename)]
+    layout = CUSTOM_LAYOUTS[layout_index] if layout_index < len(CUSTOM_LAYOUTS) else CUSTOM_LAYOUTS[0]
+    return [(x, y, z) for _, x, y, z in layout]